@@ -0,0 +1,38 @@
+"""
+Shared HTTP session used by the agents for their API calls
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Whether agents can await their API requests instead of blocking a thread
+ASYNC_HTTP = aiohttp is not None
+
+def _create_session():
+    """Create a pooled keep-alive session that retries transient errors"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        # Gateway errors are usually transient, so idempotent requests retry them too
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# One session for all agents so DNS/TCP/TLS setup is paid once per host
+SESSION = _create_session()
+
+async def get_json_async(url, headers=None, params=None, timeout=10):
+    """GET url and decode its JSON body on the event loop (requires aiohttp)"""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async with session.get(url, headers=headers, params=params) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
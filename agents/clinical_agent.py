@@ -1,6 +1,6 @@
-import pandas as pd
-import requests
 import os
+from ._http import SESSION
+from utils.data_loader import load_table, to_records
 
 class ClinicalAgent:
     def __init__(self):
@@ -9,6 +9,11 @@ class ClinicalAgent:
         # Fallback to local data
         self.data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'clinical_trials.csv')
         self.use_api = os.getenv('USE_API', 'false').lower() == 'true'
+        # Parsed data is cached and only reloaded when the file changes
+        self._df = None
+        self._mol_lower = None
+        self._charts = {}
+        self._mtime = None
 
     def analyze(self, query):
         """
@@ -24,7 +29,7 @@ class ClinicalAgent:
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
             params = {'query': query, 'type': 'clinical_trials'}
-            response = requests.get(self.api_url, headers=headers, params=params, timeout=10)
+            response = SESSION.get(self.api_url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
 
@@ -44,36 +49,58 @@ class ClinicalAgent:
             # API failed, fall back to local
             return self._analyze_from_file(query)
 
+    def _load(self):
+        """Load the trial data once, reloading only when the file changes on disk"""
+        mtime = os.path.getmtime(self.data_path)
+        if self._df is None or mtime != self._mtime:
+            # Arrow-backed columns, with the repeated labels stored as categories
+            self._df = load_table(self.data_path, categories=['Molecule', 'Status', 'Phase'],
+                                  parse_dates=['Start Date', 'End Date'], dtype_backend='pyarrow')
+            # Lowercased once per load instead of on every query
+            self._mol_lower = self._df['Molecule'].str.lower().fillna('')
+            # Charts describe the whole dataset, so they only change on reload
+            self._charts = {
+                'trial_phases': self._df['Phase'].value_counts().to_dict(),
+                'trial_status': self._df['Status'].value_counts().to_dict()
+            }
+            self._mtime = mtime
+        return self._df
+
     def _analyze_from_file(self, query):
         # Original file-based logic
-        self.data = pd.read_csv(self.data_path)
-        self.data['Start Date'] = pd.to_datetime(self.data['Start Date'])
-        self.data['End Date'] = pd.to_datetime(self.data['End Date'])
+        self.data = self._load()
         query_lower = query.lower()
-        matching_rows = self.data[self.data['Molecule'].str.lower().str.contains(query_lower, na=False)]
+        matching_rows = self.data[self._mol_lower.str.contains(query_lower, regex=False)]
 
         if not matching_rows.empty:
-            completed_trials = matching_rows[matching_rows['Status'] == 'Completed']
-            ongoing_trials = matching_rows[matching_rows['Status'] != 'Completed']
-            phases = matching_rows['Phase'].value_counts().to_dict()
+            # One pass over Status; everything not completed counts as ongoing
+            is_completed = matching_rows['Status'] == 'Completed'
+            completed = int(is_completed.sum())
+            ongoing = len(matching_rows) - completed
+            phase_counts = matching_rows['Phase'].value_counts()
+            # Categorical counts include phases that have no matching trial
+            phases = phase_counts[phase_counts > 0].to_dict()
             total_participants = matching_rows['Participants'].sum()
 
             insights = f"Clinical trials for {query}: "
-            insights += f"{len(completed_trials)} completed, {len(ongoing_trials)} ongoing, "
+            insights += f"{completed} completed, {ongoing} ongoing, "
             insights += f"Total participants: {total_participants}, "
             insights += f"Phases: {', '.join([f'{k}: {v}' for k, v in phases.items()])}"
 
-            positive_results = completed_trials[completed_trials['Results'].str.contains('Positive', case=False, na=False)]
-            if not positive_results.empty:
-                insights += f", {len(positive_results)} trials showed positive results"
+            # Only the count is needed, so combine the masks instead of slicing
+            is_positive = matching_rows['Results'].str.contains('Positive', case=False, regex=False, na=False)
+            positive = int((is_completed & is_positive).sum())
+            if positive:
+                insights += f", {positive} trials showed positive results"
 
-            data = matching_rows.to_dict('records')
+            data = to_records(matching_rows)
         else:
             # Generate mock clinical trial data relevant to the query
             mock_trials = self._generate_mock_trials(query)
             insights = f"Clinical trials for '{query}': "
-            insights += f"{len([t for t in mock_trials if t['Status'] == 'Completed'])} completed, "
-            insights += f"{len([t for t in mock_trials if t['Status'] != 'Completed'])} ongoing, "
+            completed = sum(t['Status'] == 'Completed' for t in mock_trials)
+            insights += f"{completed} completed, "
+            insights += f"{len(mock_trials) - completed} ongoing, "
             insights += f"Estimated total participants: {sum(t['Participants'] for t in mock_trials)}, "
             phase_info = [f"{t['Phase']}: 1" for t in mock_trials[:3]]
             insights += f"Phases: {', '.join(phase_info)}"
@@ -88,49 +115,41 @@ class ClinicalAgent:
 
     def _generate_charts(self):
         """Generate trial phase distribution"""
-        if hasattr(self, 'data'):
-            phase_counts = self.data['Phase'].value_counts().to_dict()
-            status_counts = self.data['Status'].value_counts().to_dict()
-            return {
-                'trial_phases': phase_counts,
-                'trial_status': status_counts
-            }
-        return {}
+        return self._charts
 
     def _generate_mock_trials(self, query):
         """Generate mock clinical trial data for the query"""
-        import random
-        from datetime import datetime, timedelta
-
-        trials = []
-        num_trials = random.randint(2, 5)
+        import numpy as np
 
-        for i in range(num_trials):
-            phases = ['Phase 1', 'Phase 2', 'Phase 3', 'Phase 4']
-            statuses = ['Completed', 'Recruiting', 'Active', 'Terminated']
+        # Draw every field for all trials in one vectorized call each
+        rng = np.random.default_rng()
+        num_trials = int(rng.integers(2, 6))
 
-            # Bias towards more advanced phases for established queries
-            phase_weights = [0.3, 0.3, 0.3, 0.1] if len(query) > 5 else [0.4, 0.3, 0.2, 0.1]
-            phase = random.choices(phases, weights=phase_weights)[0]
+        # Bias towards more advanced phases for established queries
+        phase_weights = [0.3, 0.3, 0.3, 0.1] if len(query) > 5 else [0.4, 0.3, 0.2, 0.1]
+        phases = rng.choice(['Phase 1', 'Phase 2', 'Phase 3', 'Phase 4'], size=num_trials, p=phase_weights)
+        statuses = rng.choice(['Completed', 'Recruiting', 'Active', 'Terminated'], size=num_trials)
+        participants = rng.integers(50, 2001, size=num_trials)
+        results = rng.choice(['Positive', 'Neutral', 'Ongoing analysis', 'Superior to placebo'], size=num_trials)
 
-            status = random.choice(statuses)
-            participants = random.randint(50, 2000)
+        # Generate realistic dates: started 1-5 years ago, running 6 months to 3 years
+        start_dates = np.datetime64('today', 'D') - rng.integers(365, 365*5 + 1, size=num_trials)
+        end_dates = start_dates + rng.integers(180, 1096, size=num_trials)
 
-            # Generate realistic dates
-            start_date = datetime.now() - timedelta(days=random.randint(365, 365*5))
-            end_date = start_date + timedelta(days=random.randint(180, 1095))  # 6 months to 3 years
+        trial_id_base = 20240000 + hash(query) % 10000
+        columns = zip(phases.tolist(), statuses.tolist(), participants.tolist(), results.tolist(),
+                      np.datetime_as_string(start_dates).tolist(), np.datetime_as_string(end_dates).tolist())
 
-            results = random.choice(['Positive', 'Neutral', 'Ongoing analysis', 'Superior to placebo'])
-
-            trials.append({
+        return [
+            {
                 'Molecule': query,
-                'Trial ID': f'NCT{20240000 + i + hash(query) % 10000}',
+                'Trial ID': f'NCT{trial_id_base + i}',
                 'Phase': phase,
                 'Status': status,
-                'Participants': participants,
-                'Results': results,
-                'Start Date': start_date.strftime('%Y-%m-%d'),
-                'End Date': end_date.strftime('%Y-%m-%d')
-            })
-
-        return trials
+                'Participants': count,
+                'Results': result,
+                'Start Date': start_date,
+                'End Date': end_date
+            }
+            for i, (phase, status, count, result, start_date, end_date) in enumerate(columns)
+        ]
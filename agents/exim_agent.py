@@ -1,6 +1,6 @@
-import pandas as pd
-import requests
 import os
+from ._http import SESSION
+from utils.data_loader import load_table, to_records
 
 class EXIMAgent:
     def __init__(self):
@@ -9,6 +9,11 @@ class EXIMAgent:
         # Fallback to local data
         self.data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'exim_data.csv')
         self.use_api = os.getenv('USE_API', 'false').lower() == 'true'
+        # Parsed data is cached and only reloaded when the file changes
+        self._df = None
+        self._mol_lower = None
+        self._charts = {}
+        self._mtime = None
 
     def analyze(self, query):
         """
@@ -24,7 +29,7 @@ class EXIMAgent:
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
             params = {'query': query, 'type': 'trade_data'}
-            response = requests.get(self.api_url, headers=headers, params=params, timeout=10)
+            response = SESSION.get(self.api_url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
 
@@ -44,11 +49,29 @@ class EXIMAgent:
             # API failed, fall back to local
             return self._analyze_from_file(query)
 
+    def _load(self):
+        """Load the trade data once, reloading only when the file changes on disk"""
+        mtime = os.path.getmtime(self.data_path)
+        if self._df is None or mtime != self._mtime:
+            # 'Trade Value (USD)' holds strings such as '500M', so only the volumes and year are downcast
+            self._df = load_table(self.data_path, categories=['Country', 'Molecule'],
+                                  integers=['Import Volume (tons)', 'Export Volume (tons)', 'Year'])
+            # Lowercased once per load instead of on every query
+            self._mol_lower = self._df['Molecule'].str.lower().fillna('')
+            # Charts describe the whole dataset, so they only change on reload
+            trade_by_country = self._df.groupby('Country', observed=True)[['Import Volume (tons)', 'Export Volume (tons)']].sum()
+            self._charts = {
+                'imports_by_country': trade_by_country['Import Volume (tons)'].to_dict(),
+                'exports_by_country': trade_by_country['Export Volume (tons)'].to_dict()
+            }
+            self._mtime = mtime
+        return self._df
+
     def _analyze_from_file(self, query):
         # Original file-based logic
-        self.data = pd.read_csv(self.data_path)
+        self.data = self._load()
         query_lower = query.lower()
-        matching_rows = self.data[self.data['Molecule'].str.lower().str.contains(query_lower, na=False)]
+        matching_rows = self.data[self._mol_lower.str.contains(query_lower, regex=False)]
 
         if not matching_rows.empty:
             total_import = matching_rows['Import Volume (tons)'].sum()
@@ -61,7 +84,7 @@ class EXIMAgent:
             insights += f"Exports: {total_export} tons, "
             insights += f"Trade value: ${total_value}, "
             insights += f"Active in countries: {', '.join(countries)}"
-            data = matching_rows.to_dict('records')
+            data = to_records(matching_rows)
         else:
             # Generate mock trade data relevant to the query
             mock_trade = self._generate_mock_trade_data(query)
@@ -86,13 +109,7 @@ class EXIMAgent:
 
     def _generate_charts(self):
         """Generate trade volume charts"""
-        if hasattr(self, 'data'):
-            trade_by_country = self.data.groupby('Country')[['Import Volume (tons)', 'Export Volume (tons)']].sum()
-            return {
-                'imports_by_country': trade_by_country['Import Volume (tons)'].to_dict(),
-                'exports_by_country': trade_by_country['Export Volume (tons)'].to_dict()
-            }
-        return {}
+        return self._charts
 
     def _generate_mock_trade_data(self, query):
         """Generate mock trade data for the query"""
@@ -1,6 +1,18 @@
 import json
-import requests
 import os
+from bisect import bisect_right
+from ._http import SESSION
+
+# Length of the character n-grams used by the document index
+NGRAM_SIZE = 3
+
+# Separators used in the concatenated search buffer; they never occur in queries
+FIELD_SEP = '\x1f'
+DOC_SEP = '\x1e'
+
+def _ngrams(text):
+    """Return the set of character n-grams in text"""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
 
 class InternalAgent:
     def __init__(self):
@@ -9,6 +21,13 @@ class InternalAgent:
         # Fallback to local data
         self.data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'internal_docs.json')
         self.use_api = os.getenv('USE_API', 'false').lower() == 'true'
+        # Parsed documents are cached and only reloaded when the file changes
+        self._docs = None
+        self._lowered = None
+        self._ngram_index = None
+        self._blob = None
+        self._offsets = None
+        self._mtime = None
 
     def analyze(self, query):
         """
@@ -24,7 +43,7 @@ class InternalAgent:
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
             params = {'query': query, 'type': 'internal_knowledge'}
-            response = requests.get(self.api_url, headers=headers, params=params, timeout=10)
+            response = SESSION.get(self.api_url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
 
@@ -44,17 +63,70 @@ class InternalAgent:
             # API failed, fall back to local
             return self._analyze_from_file(query)
 
+    def _load(self):
+        """Load the documents once, reloading only when the file changes on disk"""
+        mtime = os.path.getmtime(self.data_path)
+        if self._docs is None or mtime != self._mtime:
+            with open(self.data_path, 'r') as f:
+                self._docs = json.load(f)
+            self._build_index()
+            self._mtime = mtime
+        return self._docs
+
+    def _build_index(self):
+        """Index every document by the n-grams of its lowercased title and content"""
+        self._lowered = [(doc['title'].lower(), doc['content'].lower()) for doc in self._docs]
+
+        # All documents in one buffer so unindexed queries run as a few C-level finds
+        parts = [f"{title}{FIELD_SEP}{content}{DOC_SEP}" for title, content in self._lowered]
+        self._offsets = []
+        position = 0
+        for part in parts:
+            self._offsets.append(position)
+            position += len(part)
+        self._blob = ''.join(parts)
+
+        self._ngram_index = {}
+        for doc_id, (title, content) in enumerate(self._lowered):
+            for gram in _ngrams(title) | _ngrams(content):
+                self._ngram_index.setdefault(gram, set()).add(doc_id)
+
+    def _search(self, query_lower):
+        """Return the documents whose title or content contains query_lower"""
+        if len(query_lower) < NGRAM_SIZE:
+            # Too short to index, scan every document
+            if FIELD_SEP in query_lower or DOC_SEP in query_lower:
+                candidates = range(len(self._docs))
+            else:
+                return [self._docs[doc_id] for doc_id in self._scan_blob(query_lower)]
+        else:
+            # A substring match must contain every n-gram of the query
+            postings = sorted((self._ngram_index.get(gram, set()) for gram in _ngrams(query_lower)), key=len)
+            candidates = sorted(set.intersection(*postings))
+
+        return [self._docs[doc_id] for doc_id in candidates
+                if query_lower in self._lowered[doc_id][0] or query_lower in self._lowered[doc_id][1]]
+
+    def _scan_blob(self, query_lower):
+        """Return the ids of the documents containing query_lower, in order"""
+        if not self._offsets:
+            return []
+        doc_ids = []
+        position = self._blob.find(query_lower)
+        while position != -1:
+            doc_id = max(bisect_right(self._offsets, position) - 1, 0)
+            doc_ids.append(doc_id)
+            # Continue from the next document, one hit per document is enough
+            if doc_id + 1 >= len(self._offsets):
+                break
+            position = self._blob.find(query_lower, self._offsets[doc_id + 1])
+        return doc_ids
+
     def _analyze_from_file(self, query):
         # Original file-based logic
-        with open(self.data_path, 'r') as f:
-            self.data = json.load(f)
+        self.data = self._load()
         query_lower = query.lower()
-        matching_docs = []
-
-        for doc in self.data:
-            if (query_lower in doc['title'].lower() or
-                query_lower in doc['content'].lower()):
-                matching_docs.append(doc)
+        matching_docs = self._search(query_lower)
 
         if matching_docs:
             insights = f"Found {len(matching_docs)} relevant internal documents for '{query}': "
@@ -1,99 +1,187 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import json
 import os
+from pathlib import Path
+from config import config
+from utils.cache import TTLCache, DiskCache
+from ._http import SESSION
 
 class LiteratureAgent:
     def __init__(self):
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
         # In production, get API key from environment
         self.api_key = os.getenv('PUBMED_API_KEY', '')
+        # Shared keep-alive session so consecutive E-utilities calls reuse one connection
+        self._session = SESSION
+        self.retmax = '20'
+        # PubMed rate-limits clients, so successful responses are cached in memory and on disk
+        cache_ttl = config.get('data', 'max_cache_age_hours', 24) * 3600
+        self._memory_cache = TTLCache(maxsize=256, ttl=cache_ttl)
+        self._disk_cache = DiskCache(Path(config.get('data', 'cache_dir')) / 'pubmed', ttl=cache_ttl)
 
     def analyze(self, query):
         """
         Search PubMed for literature related to the query
         In production, this connects to PubMed API
         """
-        result = self._analyze_from_api(query)
+        result = self._cached_result(query)
+        if result is None:
+            result = self._analyze_from_api(query)
+            self._store_result(query, result)
         # If API fails or returns empty, fall back to mock data
         if not result['data']:
             return self._analyze_from_mock(query)
         return result
 
-    def _analyze_from_api(self, query):
+    def analyze_many(self, queries):
+        """
+        Search PubMed for several queries at once
+        The searches run concurrently and all summaries are fetched in a single request
+        """
+        queries = list(queries)
+        results = {}
+        for query in queries:
+            cached = self._cached_result(query)
+            if cached is not None:
+                results[query] = cached
+
+        queries = [query for query in queries if query not in results]
+        if not queries:
+            return results
+
+        # PubMed allows 3 requests/second without an API key and 10 with one
+        max_workers = min(len(queries), 10 if self.api_key else 3)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            searches = list(executor.map(self._safe_search_ids, queries))
+
+        all_ids = []
+        for ids, _ in searches:
+            for uid in (ids or [])[:5]:
+                if uid not in all_ids:
+                    all_ids.append(uid)
+
         try:
-            # Search for articles
-            search_url = f"{self.base_url}esearch.fcgi"
-            params = {
-                'db': 'pubmed',
-                'term': query,
-                'retmax': '20',
-                'retmode': 'json',
-                'api_key': self.api_key
-            }
+            summaries = self._fetch_summaries(all_ids) if all_ids else {}
+            summary_error = None
+        except Exception as e:
+            summaries, summary_error = {}, e
 
-            response = requests.get(search_url, params=params)
-            search_data = response.json()
-
-            if 'esearchresult' in search_data and 'idlist' in search_data['esearchresult']:
-                ids = search_data['esearchresult']['idlist']
-
-                if ids:
-                    # Get summaries
-                    summary_url = f"{self.base_url}esummary.fcgi"
-                    summary_params = {
-                        'db': 'pubmed',
-                        'id': ','.join(ids[:5]),  # Top 5
-                        'retmode': 'json',
-                        'api_key': self.api_key
-                    }
-
-                    summary_response = requests.get(summary_url, params=summary_params)
-                    summary_data = summary_response.json()
-
-                    articles = []
-                    if 'result' in summary_data:
-                        for uid in ids[:5]:
-                            if uid in summary_data['result']:
-                                article = summary_data['result'][uid]
-                                articles.append({
-                                    'title': article.get('title', ''),
-                                    'authors': article.get('authors', []),
-                                    'journal': article.get('source', ''),
-                                    'pubdate': article.get('pubdate', ''),
-                                    'pmid': uid
-                                })
-
-                    insights = f"Found {len(articles)} recent publications on '{query}' in PubMed. Latest research trends and findings."
-
-                    return {
-                        'agent': 'Literature Review',
-                        'insights': insights,
-                        'data': articles,
-                        'charts': {}
-                    }
-                else:
-                    return {
-                        'agent': 'Literature Review',
-                        'insights': f"No publications found for '{query}' in PubMed.",
-                        'data': [],
-                        'charts': {}
-                    }
+        for query, (ids, error) in zip(queries, searches):
+            error = error or (summary_error if ids else None)
+            if error is not None:
+                result = self._error_result(error)
             else:
-                return {
-                    'agent': 'Literature Review',
-                    'insights': "Unable to search PubMed at this time.",
-                    'data': [],
-                    'charts': {}
-                }
+                result = self._build_result(query, ids, summaries)
+                self._store_result(query, result)
+            results[query] = result if result['data'] else self._analyze_from_mock(query)
+        return results
+
+    def _cached_result(self, query):
+        """Return a copy of the cached PubMed result for query, or None on a miss"""
+        key = ('pubmed', query, self.retmax)
+        result = self._memory_cache.get(key)
+        if result is None:
+            result = self._disk_cache.get(key)
+            if result is None:
+                return None
+            self._memory_cache.set(key, result)
+        # Copied so callers can't mutate the cached entry
+        return copy.deepcopy(result)
+
+    def _store_result(self, query, result):
+        """Cache a PubMed result; failed or empty searches are not cached"""
+        if result['data']:
+            key = ('pubmed', query, self.retmax)
+            self._memory_cache.set(key, copy.deepcopy(result))
+            self._disk_cache.set(key, result)
 
+    def _params(self, **params):
+        """Build E-utilities parameters, sending the API key only when one is configured"""
+        params['retmode'] = 'json'
+        if self.api_key:
+            params['api_key'] = self.api_key
+        return params
+
+    def _search_ids(self, query):
+        """Return the PubMed ids matching query, or None if the search response is unusable"""
+        response = self._session.get(f"{self.base_url}esearch.fcgi",
+                                     params=self._params(db='pubmed', term=query, retmax=self.retmax),
+                                     timeout=10)
+        search_data = response.json()
+
+        if 'esearchresult' in search_data and 'idlist' in search_data['esearchresult']:
+            return search_data['esearchresult']['idlist']
+        return None
+
+    def _safe_search_ids(self, query):
+        try:
+            return self._search_ids(query), None
+        except Exception as e:
+            return None, e
+
+    def _fetch_summaries(self, ids):
+        """Fetch the esummary records for ids in one request"""
+        response = self._session.get(f"{self.base_url}esummary.fcgi",
+                                     params=self._params(db='pubmed', id=','.join(ids)),
+                                     timeout=10)
+        return response.json().get('result', {})
+
+    def _analyze_from_api(self, query):
+        try:
+            ids = self._search_ids(query)
+            # Get summaries for the top 5
+            summaries = self._fetch_summaries(ids[:5]) if ids else {}
+            return self._build_result(query, ids, summaries)
         except Exception as e:
+            return self._error_result(e)
+
+    def _build_result(self, query, ids, summaries):
+        if ids is None:
             return {
                 'agent': 'Literature Review',
-                'insights': f"Literature search failed: {str(e)}",
+                'insights': "Unable to search PubMed at this time.",
                 'data': [],
                 'charts': {}
             }
 
+        if not ids:
+            return {
+                'agent': 'Literature Review',
+                'insights': f"No publications found for '{query}' in PubMed.",
+                'data': [],
+                'charts': {}
+            }
+
+        articles = []
+        for uid in ids[:5]:
+            if uid in summaries:
+                article = summaries[uid]
+                articles.append({
+                    'title': article.get('title', ''),
+                    'authors': article.get('authors', []),
+                    'journal': article.get('source', ''),
+                    'pubdate': article.get('pubdate', ''),
+                    'pmid': uid
+                })
+
+        insights = f"Found {len(articles)} recent publications on '{query}' in PubMed. Latest research trends and findings."
+
+        return {
+            'agent': 'Literature Review',
+            'insights': insights,
+            'data': articles,
+            'charts': {}
+        }
+
+    def _error_result(self, error):
+        return {
+            'agent': 'Literature Review',
+            'insights': f"Literature search failed: {str(error)}",
+            'data': [],
+            'charts': {}
+        }
+
     def _analyze_from_mock(self, query):
         # Mock literature data as fallback
         mock_articles = {
@@ -1,6 +1,54 @@
+import copy
+import numpy as np
 import pandas as pd
-import requests
 import os
+import re
+from functools import lru_cache
+from ._http import SESSION
+from config import config
+from utils.cache import TTLCache
+from utils.data_loader import load_table
+
+# Keyword -> (base, spread) for the market size estimate in $B, in precedence order
+_MARKET_SIZE_TABLE = {
+    'cancer': (15.0, 10), 'tumor': (15.0, 10), 'oncology': (15.0, 10),  # 15-25B range
+    'diabetes': (25.0, 5), 'insulin': (25.0, 5),  # 25-30B range
+    'pain': (5.0, 3), 'analgesic': (5.0, 3),  # 5-8B range
+    'cardiovascular': (18.0, 4), 'heart': (18.0, 4),  # 18-22B range
+    'antiviral': (2.0, 2), 'virus': (2.0, 2),  # 2-4B range
+}
+_DEFAULT_MARKET_SIZE = (1.0, 5)  # 1-6B range
+
+# Keyword -> (base, spread) for the growth rate estimate in %, in precedence order
+_GROWTH_RATE_TABLE = {
+    'new': (12.0, 8), 'novel': (12.0, 8), 'innovative': (12.0, 8),  # Higher growth for new drugs
+    'generic': (2.0, 3),  # Lower growth for generics
+}
+_DEFAULT_GROWTH_RATE = (5.0, 10)  # 5-15% range
+
+# Keyword -> therapy area, in precedence order
+_THERAPY_AREA_TABLE = {
+    'cancer': 'Oncology', 'tumor': 'Oncology', 'carcinoma': 'Oncology',
+    'diabetes': 'Diabetes/Endocrinology', 'insulin': 'Diabetes/Endocrinology',
+    'blood sugar': 'Diabetes/Endocrinology',
+    'pain': 'Pain Management', 'analgesic': 'Pain Management', 'headache': 'Pain Management',
+    'heart': 'Cardiovascular', 'cardiovascular': 'Cardiovascular', 'cholesterol': 'Cardiovascular',
+    'virus': 'Antiviral/Infectious Diseases', 'viral': 'Antiviral/Infectious Diseases',
+    'infection': 'Antiviral/Infectious Diseases',
+    'depression': 'Psychiatry', 'anxiety': 'Psychiatry', 'mental': 'Psychiatry',
+    'arthritis': 'Rheumatology', 'joint': 'Rheumatology', 'rheumatoid': 'Rheumatology',
+}
+_DEFAULT_THERAPY_AREA = 'General Medicine'
+
+# Every keyword the estimate helpers look for
+_KEYWORDS = set(_MARKET_SIZE_TABLE) | set(_GROWTH_RATE_TABLE) | set(_THERAPY_AREA_TABLE)
+# Zero-width lookahead so overlapping keywords ('antiviral' and 'viral') are all found
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(map(re.escape, sorted(_KEYWORDS, key=len, reverse=True))) + '))')
+
+@lru_cache(maxsize=1024)
+def _match_keywords(query_lower):
+    """Return the set of keywords contained in query_lower, from a single scan"""
+    return frozenset(_KEYWORD_RE.findall(query_lower))
 
 class MarketIntelligenceAgent:
     def __init__(self):
@@ -9,22 +57,35 @@ class MarketIntelligenceAgent:
         # Fallback to local data
         self.data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'iqvia_data.csv')
         self.use_api = os.getenv('USE_API', 'false').lower() == 'true'
+        # Parsed data is cached and only reloaded when the file changes
+        self._df = None
+        self._mol_lower = None
+        self._charts = {}
+        self._mtime = None
+        # Recent results, so repeated queries skip the API and the table scan
+        self._results = TTLCache(maxsize=1024, ttl=config.get('data', 'result_cache_ttl_seconds', 300))
 
     def analyze(self, query):
         """
         Analyze market intelligence for the given query
         Connects to your market intelligence API
         """
-        if self.use_api:
-            return self._analyze_from_api(query)
-        else:
-            return self._analyze_from_file(query)
+        result = self._results.get(query)
+        if result is None:
+            if self.use_api:
+                result = self._analyze_from_api(query)
+            else:
+                result = self._analyze_from_file(query)
+            self._results.set(query, result)
+        # Copied so callers can't mutate the cached result
+        return copy.deepcopy(result)
 
     def _analyze_from_api(self, query):
         try:
             headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
             params = {'query': query, 'type': 'market_intelligence'}
-            response = requests.get(self.api_url, headers=headers, params=params, timeout=10)
+            # Separate connect/read timeouts so a dead host fails fast
+            response = SESSION.get(self.api_url, headers=headers, params=params, timeout=(3, 10))
             response.raise_for_status()
             data = response.json()
 
@@ -44,11 +105,37 @@ class MarketIntelligenceAgent:
             # API failed, fall back to local
             return self._analyze_from_file(query)
 
+    def _load(self):
+        """Load the market data once, reloading only when the file changes on disk"""
+        try:
+            mtime = os.path.getmtime(self.data_path)
+        except OSError:
+            # Missing file: an empty table sends every query to the estimates
+            mtime = None
+        if self._df is None or mtime != self._mtime:
+            if mtime is None:
+                self._df = pd.DataFrame(columns=['Molecule', 'Therapy Area', 'Market Size (USD)', 'Growth Rate (%)',
+                                                 'Competitors', 'Key Insights'])
+            else:
+                # Served from a Parquet copy of the CSV after the first load
+                self._df = load_table(self.data_path, categories=['Therapy Area'])
+            # Lowercased once per load instead of on every query
+            self._mol_lower = np.char.lower(self._df['Molecule'].fillna('').to_numpy(dtype=str))
+            # Charts describe the whole dataset, so they only change on reload
+            by_molecule = self._df.set_index('Molecule')
+            self._charts = {
+                'market_sizes': by_molecule['Market Size (USD)'].to_dict(),
+                'growth_rates': by_molecule['Growth Rate (%)'].to_dict()
+            }
+            self._mtime = mtime
+        return self._df
+
     def _analyze_from_file(self, query):
         # Original file-based logic
-        self.data = pd.read_csv(self.data_path)
+        self.data = self._load()
         query_lower = query.lower()
-        matching_rows = self.data[self.data['Molecule'].str.lower().str.contains(query_lower, na=False)]
+        # Fixed-width numpy strings avoid pandas' per-row object dispatch
+        matching_rows = self.data.iloc[np.flatnonzero(np.char.find(self._mol_lower, query_lower) >= 0)]
 
         if not matching_rows.empty:
             row = matching_rows.iloc[0]
@@ -81,55 +168,27 @@ class MarketIntelligenceAgent:
 
     def _generate_charts(self):
         """Generate simple chart data"""
-        if hasattr(self, 'data'):
-            return {
-                'market_sizes': self.data.set_index('Molecule')['Market Size (USD)'].to_dict(),
-                'growth_rates': self.data.set_index('Molecule')['Growth Rate (%)'].to_dict()
-            }
-        return {}
+        return self._charts
+
+    def _lookup(self, query, table, default):
+        """Return the table entry of the highest-precedence keyword in query"""
+        matches = _match_keywords(query.lower())
+        if matches:
+            for keyword, value in table.items():
+                if keyword in matches:
+                    return value
+        return default
 
     def _estimate_market_size(self, query):
         """Estimate market size based on query keywords"""
-        query_lower = query.lower()
-        if 'cancer' in query_lower or 'tumor' in query_lower or 'oncology' in query_lower:
-            return 15.0 + (len(query) % 10)  # 15-25B range
-        elif 'diabetes' in query_lower or 'insulin' in query_lower:
-            return 25.0 + (len(query) % 5)  # 25-30B range
-        elif 'pain' in query_lower or 'analgesic' in query_lower:
-            return 5.0 + (len(query) % 3)  # 5-8B range
-        elif 'cardiovascular' in query_lower or 'heart' in query_lower:
-            return 18.0 + (len(query) % 4)  # 18-22B range
-        elif 'antiviral' in query_lower or 'virus' in query_lower:
-            return 2.0 + (len(query) % 2)  # 2-4B range
-        else:
-            return 1.0 + (len(query) % 5)  # 1-6B range
+        base, spread = self._lookup(query, _MARKET_SIZE_TABLE, _DEFAULT_MARKET_SIZE)
+        return base + (len(query) % spread)
 
     def _estimate_growth_rate(self, query):
         """Estimate growth rate based on query"""
-        query_lower = query.lower()
-        if 'new' in query_lower or 'novel' in query_lower or 'innovative' in query_lower:
-            return 12.0 + (len(query) % 8)  # Higher growth for new drugs
-        elif 'generic' in query_lower:
-            return 2.0 + (len(query) % 3)  # Lower growth for generics
-        else:
-            return 5.0 + (len(query) % 10)  # 5-15% range
+        base, spread = self._lookup(query, _GROWTH_RATE_TABLE, _DEFAULT_GROWTH_RATE)
+        return base + (len(query) % spread)
 
     def _infer_therapy_area(self, query):
         """Infer therapy area from query keywords"""
-        query_lower = query.lower()
-        if 'cancer' in query_lower or 'tumor' in query_lower or 'carcinoma' in query_lower:
-            return 'Oncology'
-        elif 'diabetes' in query_lower or 'insulin' in query_lower or 'blood sugar' in query_lower:
-            return 'Diabetes/Endocrinology'
-        elif 'pain' in query_lower or 'analgesic' in query_lower or 'headache' in query_lower:
-            return 'Pain Management'
-        elif 'heart' in query_lower or 'cardiovascular' in query_lower or 'cholesterol' in query_lower:
-            return 'Cardiovascular'
-        elif 'virus' in query_lower or 'viral' in query_lower or 'infection' in query_lower:
-            return 'Antiviral/Infectious Diseases'
-        elif 'depression' in query_lower or 'anxiety' in query_lower or 'mental' in query_lower:
-            return 'Psychiatry'
-        elif 'arthritis' in query_lower or 'joint' in query_lower or 'rheumatoid' in query_lower:
-            return 'Rheumatology'
-        else:
-            return 'General Medicine'
\ No newline at end of file
+        return self._lookup(query, _THERAPY_AREA_TABLE, _DEFAULT_THERAPY_AREA)
@@ -1,4 +1,8 @@
+import copy
+import importlib
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from .market_agent import MarketIntelligenceAgent
 from .exim_agent import EXIMAgent
 from .patent_agent import PatentAgent
@@ -7,13 +11,29 @@ from .internal_agent import InternalAgent
 from .web_agent import WebAgent
 from .literature_agent import LiteratureAgent
 from config import config
+from utils.cache import TTLCache
 from utils.robust_utils import logger, create_error_response, check_memory_usage
 
+# Characters of each agent's insights quoted in the summary
+INSIGHT_PREVIEW_LENGTH = 200
+
+RECOMMENDATIONS_TEMPLATE = (
+    "### Strategic Recommendations\n"
+    "- Review patent landscape for IP opportunities\n"
+    "- Monitor clinical trial progress\n"
+    "- Assess market potential and competition\n"
+    "- Consider regulatory and trade implications\n"
+    "- Review latest scientific literature\n\n"
+)
+
 class MasterAgent:
     def __init__(self):
+        # Agents are created on first use, so a run only pays for the agents it selects
         self.agents = {}
+        self._factories = {}
+        self._locks = {}
 
-        # Initialize core agents (always available)
+        # Core agents (always available)
         core_agents = {
             'market': MarketIntelligenceAgent,
             'exim': EXIMAgent,
@@ -23,33 +43,18 @@ class MasterAgent:
             'web': WebAgent,
             'literature': LiteratureAgent
         }
+        self._factories.update(core_agents)
 
-        for name, agent_class in core_agents.items():
-            try:
-                self.agents[name] = agent_class()
-                logger.debug(f"Initialized {name} agent")
-            except Exception as e:
-                logger.error(f"Failed to initialize {name} agent: {e}")
-                # Create a fallback agent that returns error responses
-                self.agents[name] = self._create_fallback_agent(name, e)
-
-        # Initialize ML agents conditionally
+        # ML agents are only imported when enabled and first requested
         ml_agents = {
-            'ml_prediction': ('ml_prediction_agent', 'prediction', 'MLPredictionAgent'),
+            'ml_prediction': ('ml_prediction_agent', 'ml_prediction', 'MLPredictionAgent'),
             'generative_ai': ('generative_ai_agent', 'generative_ai', 'GenerativeAIAgent'),
             'nlp_analysis': ('nlp_analysis_agent', 'nlp_analysis', 'NLPAnalysisAgent')
         }
 
         for agent_name, (module_name, feature, class_name) in ml_agents.items():
             if config.is_ml_enabled(feature):
-                try:
-                    module = __import__(f'agents.{module_name}', fromlist=[module_name])
-                    agent_class = getattr(module, class_name)
-                    self.agents[agent_name] = agent_class()
-                    logger.debug(f"Initialized {agent_name} agent")
-                except Exception as e:
-                    logger.warning(f"ML agent {agent_name} disabled: {e}")
-                    self.agents[agent_name] = self._create_fallback_agent(agent_name, e)
+                self._factories[agent_name] = self._ml_agent_factory(module_name, class_name)
             else:
                 logger.info(f"ML agent {agent_name} disabled in config")
                 self.agents[agent_name] = self._create_fallback_agent(
@@ -57,7 +62,40 @@ class MasterAgent:
                     Exception(f"{agent_name} disabled in configuration")
                 )
 
-        logger.info(f"Initialized {len(self.agents)} agents total")
+        self._locks = {name: threading.Lock() for name in self._factories}
+        logger.info(f"Registered {len(self._factories) + len(self.agents)} agents total")
+
+        # Completed (results, summary) pairs keyed by (query, analysis_type)
+        self._analysis_cache = TTLCache(maxsize=256, ttl=config.get('data', 'result_cache_ttl_seconds', 300))
+
+    @staticmethod
+    def _ml_agent_factory(module_name, class_name):
+        """Return a callable that imports and instantiates an ML agent"""
+        def factory():
+            module = importlib.import_module(f'agents.{module_name}')
+            return getattr(module, class_name)()
+        return factory
+
+    def _get_agent(self, name):
+        """Return the agent for name, creating it on first use"""
+        agent = self.agents.get(name)
+        if agent is not None:
+            return agent
+
+        # Per-agent lock: concurrent runs create each agent once, without
+        # serializing the construction of different agents
+        with self._locks[name]:
+            agent = self.agents.get(name)
+            if agent is None:
+                try:
+                    agent = self._factories[name]()
+                    logger.debug(f"Initialized {name} agent")
+                except Exception as e:
+                    logger.warning(f"Agent {name} disabled: {e}")
+                    # Create a fallback agent that returns error responses
+                    agent = self._create_fallback_agent(name, e)
+                self.agents[name] = agent
+        return agent
 
     def _create_fallback_agent(self, name, error):
         """Create a fallback agent that returns error responses"""
@@ -71,6 +109,12 @@ class MasterAgent:
 
         return FallbackAgent(name, error)
 
+    def get_cached_analysis(self, query, analysis_type):
+        """Return the cached (results, summary) for a recent identical run, or None"""
+        cached = self._analysis_cache.get((query, analysis_type))
+        # Copied so one job's results can't change another's or the cache's
+        return copy.deepcopy(cached) if cached is not None else None
+
     def run_analysis(self, query, analysis_type, progress_callback=None):
         """
         Run analysis based on type with robust error handling
@@ -83,6 +127,14 @@ class MasterAgent:
             analysis_type = 'comprehensive'
             logger.warning(f"Invalid analysis type, defaulting to comprehensive")
 
+        cache_key = (query, analysis_type)
+        cached = self.get_cached_analysis(query, analysis_type)
+        if cached is not None:
+            logger.info(f"Serving cached analysis for query '{query[:50]}...'")
+            if progress_callback:
+                progress_callback("Analysis complete!", 1.0)
+            return cached
+
         # Check memory before starting
         if not check_memory_usage():
             logger.warning("High memory usage detected, proceeding cautiously")
@@ -97,44 +149,70 @@ class MasterAgent:
         selected_agents = agent_configs.get(analysis_type, agent_configs['comprehensive'])
 
         # Filter to only available agents
-        available_agents = [name for name in selected_agents if name in self.agents]
+        available_agents = [name for name in selected_agents if name in self.agents or name in self._factories]
         if len(available_agents) != len(selected_agents):
             missing = set(selected_agents) - set(available_agents)
             logger.warning(f"Some agents not available: {missing}")
 
         results = {}
         total_agents = len(available_agents)
+        # Runs where an agent failed are not cached, so the next request retries them
+        all_succeeded = True
 
         if progress_callback:
             progress_callback("Starting analysis...", 0)
 
-        for i, agent_name in enumerate(available_agents):
-            try:
-                if progress_callback:
-                    progress_callback(f"Running {agent_name.replace('_', ' ').title()} agent...", i / total_agents)
-
-                agent = self.agents[agent_name]
-                start_time = time.time()
-
-                result = agent.analyze(query)
-
-                elapsed = time.time() - start_time
-                logger.debug(f"{agent_name} agent completed in {elapsed:.2f}s")
+        def run_agent(agent_name):
+            start_time = time.time()
+            result = self._get_agent(agent_name).analyze(query)
+            elapsed = time.time() - start_time
+            logger.debug(f"{agent_name} agent completed in {elapsed:.2f}s")
+            return result
+
+        # Agents are mostly I/O bound, so running them side by side makes the
+        # wall time roughly that of the slowest agent rather than the sum
+        executor = ThreadPoolExecutor(max_workers=max(1, min(10, total_agents)))
+        futures = {executor.submit(run_agent, name): name for name in available_agents}
+        completed = 0
+        try:
+            for future in as_completed(futures, timeout=config.get('data', 'agent_timeout_seconds', 120)):
+                agent_name = futures[future]
+                try:
+                    result = future.result()
 
-                # Validate result structure
-                if not isinstance(result, dict) or 'agent' not in result:
-                    logger.warning(f"Invalid result structure from {agent_name}")
-                    result = create_error_response(agent_name, Exception("Invalid result structure"))
+                    # Validate result structure
+                    if not isinstance(result, dict) or 'agent' not in result:
+                        logger.warning(f"Invalid result structure from {agent_name}")
+                        result = create_error_response(agent_name, Exception("Invalid result structure"))
+                        all_succeeded = False
 
-                results[agent_name] = result
+                    results[agent_name] = result
 
-            except Exception as e:
-                logger.error(f"Agent {agent_name} failed: {e}")
-                results[agent_name] = create_error_response(agent_name, e)
+                except Exception as e:
+                    logger.error(f"Agent {agent_name} failed: {e}")
+                    results[agent_name] = create_error_response(agent_name, e)
+                    all_succeeded = False
 
-            # Periodic memory check
-            if i % 3 == 0:  # Check every 3 agents
-                check_memory_usage()
+                completed += 1
+                if progress_callback:
+                    progress_callback(f"{agent_name.replace('_', ' ').title()} agent finished", completed / total_agents * 0.9)
+
+                # Periodic memory check
+                if completed % 3 == 0:  # Check every 3 agents
+                    check_memory_usage()
+        except FuturesTimeoutError:
+            for future, agent_name in futures.items():
+                if agent_name not in results:
+                    future.cancel()
+                    logger.error(f"Agent {agent_name} timed out")
+                    results[agent_name] = create_error_response(agent_name, TimeoutError("Agent timed out"))
+            all_succeeded = False
+        finally:
+            # Don't block on agents that overran the timeout
+            executor.shutdown(wait=False)
+
+        # Report results in the configured agent order, not completion order
+        results = {name: results[name] for name in available_agents}
 
         if progress_callback:
             progress_callback("Synthesizing results...", 0.95)
@@ -145,34 +223,34 @@ class MasterAgent:
         except Exception as e:
             logger.error(f"Failed to synthesize results: {e}")
             summary = f"## Analysis Summary for '{query}'\n\nError synthesizing results: {e}"
+            all_succeeded = False
 
         if progress_callback:
             progress_callback("Analysis complete!", 1.0)
 
-        logger.info(f"Analysis completed for query '{query[:50]}...' with {len(results)} results")
-        return results, summary
+        if all_succeeded:
+            # Stored as a copy, since the caller gets (and may change) the originals
+            self._analysis_cache.set(cache_key, copy.deepcopy((results, summary)))
 
+        logger.info(f"Analysis completed for query '{query[:50]}...' with {len(results)} results")
         return results, summary
 
     def _synthesize_results(self, results, query):
         """Synthesize a comprehensive summary from all agent results"""
-        summary = f"## Analysis Summary for '{query}'\n\n"
-
-        # Executive summary
-        summary += "### Executive Summary\n"
-        summary += f"This analysis covers {len(results)} aspects of the query '{query}'.\n\n"
+        # Collected as parts and joined once instead of repeated string +=
+        parts = [
+            f"## Analysis Summary for '{query}'\n\n",
+            # Executive summary
+            "### Executive Summary\n",
+            f"This analysis covers {len(results)} aspects of the query '{query}'.\n\n"
+        ]
 
         # Key findings from each agent
         for agent_name, result in results.items():
             if 'insights' in result:
-                summary += f"**{agent_name.title()} Insights:** {result['insights'][:200]}...\n\n"
-
-        # Recommendations
-        summary += "### Strategic Recommendations\n"
-        summary += "- Review patent landscape for IP opportunities\n"
-        summary += "- Monitor clinical trial progress\n"
-        summary += "- Assess market potential and competition\n"
-        summary += "- Consider regulatory and trade implications\n"
-        summary += "- Review latest scientific literature\n\n"
+                insights = result['insights']
+                ellipsis = '...' if len(insights) > INSIGHT_PREVIEW_LENGTH else ''
+                parts.append(f"**{agent_name.title()} Insights:** {insights[:INSIGHT_PREVIEW_LENGTH]}{ellipsis}\n\n")
 
-        return summary
\ No newline at end of file
+        parts.append(RECOMMENDATIONS_TEMPLATE)
+        return ''.join(parts)
@@ -1,99 +1,104 @@
-import pandas as pd
 import numpy as np
+import joblib
+import sklearn
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import os
 import json
+import copy
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from config import config
+from utils.robust_utils import logger
+
+# Bump when the training data or model setup changes so stale files are not loaded
+MODEL_VERSION = 3
+
+# Descriptor columns, in the order the scaler and models expect them
+FEATURES = ['molecular_weight', 'logp', 'hbd', 'hba', 'tpsa']
+# Mock descriptors are offset + (query_hash % modulus), per feature
+_DESCRIPTOR_OFFSETS = np.array([200, -1, 0, 2, 40])
+_DESCRIPTOR_MODULI = np.array([300, 7, 8, 10, 120])
 
 class MLPredictionAgent:
     def __init__(self):
         self.models = {}
-        self.scalers = {}
+        self.scaler = None
         self._load_or_train_models()
+        # Descriptors and models are deterministic, so results are cached per query;
+        # failures raise and are therefore never cached
+        self._cached_predict = lru_cache(maxsize=4096)(self._predict)
+
+    def _model_path(self):
+        """Location of the persisted models; pickles are only valid for one sklearn version"""
+        model_dir = Path(config.get('ml', 'model_cache_dir'))
+        return model_dir / f"ml_prediction_v{MODEL_VERSION}_sklearn{sklearn.__version__}.joblib"
 
     def _load_or_train_models(self):
         """Load pre-trained models or train new ones"""
-        # Mock drug property data for training
-        drug_data = {
-            'molecular_weight': np.random.uniform(100, 500, 1000),
-            'logp': np.random.uniform(-2, 6, 1000),
-            'hbd': np.random.randint(0, 10, 1000),
-            'hba': np.random.randint(0, 15, 1000),
-            'tpsa': np.random.uniform(0, 200, 1000),
-            'toxicity': np.random.uniform(0, 1, 1000),
-            'solubility': np.random.uniform(-10, 2, 1000),
-            'bioavailability': np.random.uniform(0, 100, 1000)
-        }
+        model_path = self._model_path()
+        try:
+            saved = joblib.load(model_path)
+            self.models, self.scaler = saved['models'], saved['scaler']
+            logger.debug(f"Loaded ML prediction models from {model_path}")
+            return
+        except Exception:
+            pass  # Not trained yet or unreadable, train below
 
-        df = pd.DataFrame(drug_data)
+        self._train_models()
 
-        # Train models for different properties
-        properties = ['toxicity', 'solubility', 'bioavailability']
-        for prop in properties:
-            X = df[['molecular_weight', 'logp', 'hbd', 'hba', 'tpsa']]
-            y = df[prop]
+        tmp_path = model_path.with_name(f"{model_path.name}.{os.getpid()}.tmp")
+        try:
+            model_path.parent.mkdir(parents=True, exist_ok=True)
+            joblib.dump({'models': self.models, 'scaler': self.scaler}, tmp_path, compress=3)
+            # Atomic rename so concurrent loaders never read a partial file
+            os.replace(tmp_path, model_path)
+        except Exception as e:
+            logger.warning(f"Could not save ML prediction models: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _train_models(self):
+        """Train the property models on mock data"""
+        # Mock drug property data for training, seeded so every run trains the same
+        # models; plain numpy arrays go straight to sklearn without a DataFrame
+        rng = np.random.default_rng(42)
+        n_samples = 1000
+        X = np.column_stack([
+            rng.uniform(100, 500, n_samples),  # molecular_weight
+            rng.uniform(-2, 6, n_samples),     # logp
+            rng.integers(0, 10, n_samples),    # hbd
+            rng.integers(0, 15, n_samples),    # hba
+            rng.uniform(0, 200, n_samples)     # tpsa
+        ]).astype(np.float64)
+        targets = {
+            'toxicity': rng.uniform(0, 1, n_samples),
+            'solubility': rng.uniform(-10, 2, n_samples),
+            'bioavailability': rng.uniform(0, 100, n_samples)
+        }
 
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        # 80/20 split; every property is trained on the same features and split,
+        # so one scaler serves all models and queries are scaled once
+        train_idx = rng.permutation(n_samples)[:int(n_samples * 0.8)]
 
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
+        self.scaler = StandardScaler()
+        X_train_scaled = self.scaler.fit_transform(X[train_idx])
 
-            model = RandomForestRegressor(n_estimators=100, random_state=42)
-            model.fit(X_train_scaled, y_train)
+        # Train models for different properties
+        for prop, y in targets.items():
+            model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+            model.fit(X_train_scaled, y[train_idx])
 
             self.models[prop] = model
-            self.scalers[prop] = scaler
 
     def analyze(self, query):
         """
         Predict drug properties using ML models
         """
         try:
-            # Generate mock molecular descriptors for the query
-            # In production, this would use actual molecular structure
-            descriptors = self._get_molecular_descriptors(query)
-
-            predictions = {}
-            for prop, model in self.models.items():
-                # Ensure descriptors are in the correct order for the scaler
-                feature_order = ['molecular_weight', 'logp', 'hbd', 'hba', 'tpsa']
-                feature_values = [descriptors[feat] for feat in feature_order]
-                
-                scaled_features = self.scalers[prop].transform([feature_values])
-                prediction = model.predict(scaled_features)[0]
-                
-                # Ensure prediction is a number
-                if isinstance(prediction, (int, float, np.number)):
-                    predictions[prop] = float(prediction)
-                else:
-                    raise ValueError(f"Model returned non-numeric prediction: {type(prediction)}")
-
-            insights = f"ML predictions for '{query}': Toxicity risk: {predictions['toxicity']:.2f}, Solubility: {predictions['solubility']:.2f}, Bioavailability: {predictions['bioavailability']:.1f}%"
-
-            # Create prediction data
-            prediction_data = [
-                {'property': 'Toxicity Risk', 'value': predictions['toxicity'], 'unit': 'score (0-1)'},
-                {'property': 'Solubility', 'value': predictions['solubility'], 'unit': 'logS'},
-                {'property': 'Bioavailability', 'value': predictions['bioavailability'], 'unit': '%'},
-            ]
-
-            # Create charts data
-            charts = {
-                'predictions': {
-                    'labels': ['Toxicity Risk', 'Solubility (logS)', 'Bioavailability (%)'],
-                    'values': [predictions['toxicity'], predictions['solubility'], predictions['bioavailability']],
-                    'type': 'bar',
-                    'colors': ['#ff6b6b', '#4ecdc4', '#45b7d1']
-                }
-            }
-
-            return {
-                'agent': 'ML Predictions',
-                'insights': insights,
-                'data': prediction_data,
-                'charts': charts
-            }
+            # Copied so callers can't mutate the cached result
+            return copy.deepcopy(self._cached_predict(query))
 
         except Exception as e:
             return {
@@ -103,15 +108,58 @@ class MLPredictionAgent:
                 'charts': {}
             }
 
+    def _predict(self, query):
+        """Build the prediction result for a query; a pure function of the query"""
+        # Generate mock molecular descriptors for the query
+        # In production, this would use actual molecular structure
+        descriptors = self._get_molecular_descriptors(query)
+
+        # Scale the descriptor row once and reuse it for every property model
+        features = np.array([[descriptors[feat] for feat in FEATURES]], dtype=np.float64)
+        scaled_features = self.scaler.transform(features)
+
+        predictions = {}
+        for prop, model in self.models.items():
+            prediction = model.predict(scaled_features)[0]
+
+            # Ensure prediction is a number
+            if isinstance(prediction, (int, float, np.number)):
+                predictions[prop] = float(prediction)
+            else:
+                raise ValueError(f"Model returned non-numeric prediction: {type(prediction)}")
+
+        insights = f"ML predictions for '{query}': Toxicity risk: {predictions['toxicity']:.2f}, Solubility: {predictions['solubility']:.2f}, Bioavailability: {predictions['bioavailability']:.1f}%"
+
+        # Create prediction data
+        prediction_data = [
+            {'property': 'Toxicity Risk', 'value': predictions['toxicity'], 'unit': 'score (0-1)'},
+            {'property': 'Solubility', 'value': predictions['solubility'], 'unit': 'logS'},
+            {'property': 'Bioavailability', 'value': predictions['bioavailability'], 'unit': '%'},
+        ]
+
+        # Create charts data
+        charts = {
+            'predictions': {
+                'labels': ['Toxicity Risk', 'Solubility (logS)', 'Bioavailability (%)'],
+                'values': [predictions['toxicity'], predictions['solubility'], predictions['bioavailability']],
+                'type': 'bar',
+                'colors': ['#ff6b6b', '#4ecdc4', '#45b7d1']
+            }
+        }
+
+        return {
+            'agent': 'ML Predictions',
+            'insights': insights,
+            'data': prediction_data,
+            'charts': charts
+        }
+
     def _get_molecular_descriptors(self, query):
         """Generate mock molecular descriptors based on drug name"""
-        # Simple hash-based approach to generate consistent descriptors
-        query_hash = hash(query) % 10000
+        # BLAKE2 rather than hash(), which is salted per process, so descriptors
+        # (and predictions) are stable across restarts
+        digest = hashlib.blake2b(query.encode('utf-8'), digest_size=8).digest()
+        query_hash = int.from_bytes(digest, 'little') % 10000
 
-        return {
-            'molecular_weight': 200 + (query_hash % 300),
-            'logp': -1 + (query_hash % 7),
-            'hbd': query_hash % 8,
-            'hba': 2 + (query_hash % 10),
-            'tpsa': 40 + (query_hash % 120)
-        }
\ No newline at end of file
+        values = _DESCRIPTOR_OFFSETS + query_hash % _DESCRIPTOR_MODULI
+        return dict(zip(FEATURES, values.tolist()))
@@ -1,13 +1,36 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
-import pandas as pd
 import json
 import os
+from utils.robust_utils import run_with_timeout
+
+# Common drug discovery themes the abstracts are scored against
+THEMES = [
+    'clinical efficacy', 'safety profile', 'mechanism of action', 'drug resistance',
+    'pharmacokinetics', 'toxicity', 'biomarkers', 'combination therapy',
+    'patient outcomes', 'molecular targets'
+]
+
+# Mock abstract templates, formatted with the query
+_ABSTRACT_TEMPLATES = (
+    "This study investigates the {q} compound in relation to therapeutic efficacy and safety profiles.",
+    "Recent advances in {q} research show promising results for clinical applications.",
+    "Molecular analysis of {q} reveals novel mechanisms of action against target proteins.",
+    "Clinical trials demonstrate significant improvements in patient outcomes with {q} treatment.",
+    "Pharmacokinetic studies of {q} indicate favorable drug distribution and metabolism.",
+    "Toxicity assessment of {q} shows acceptable safety margins for therapeutic use.",
+    "Biomarker discovery related to {q} treatment provides new diagnostic opportunities.",
+    "Combination therapies involving {q} show synergistic effects in preclinical models."
+)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+# Dynamically int8-quantized ONNX export published alongside the model
+ONNX_INT8_FILE = 'onnx/model_qint8_avx512_vnni.onnx'
 
 class NLPAnalysisAgent:
     def __init__(self):
         self.model = None
         self.model_loaded = False
+        self._theme_embeddings = None
 
     def _ensure_model_loaded(self):
         """Lazy load the model only when needed"""
@@ -18,22 +41,34 @@ class NLPAnalysisAgent:
     def _load_model(self):
         """Load the NLP model"""
         try:
-            # Try to load with timeout
-            import signal
-            def timeout_handler(signum, frame):
-                raise TimeoutError("Model loading timed out")
+            # Imported here so sentence-transformers/torch are only loaded when the agent is used
+            from sentence_transformers import SentenceTransformer
 
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(30)  # 30 second timeout
+            # Load in a worker thread with a timeout; SIGALRM is Unix-only and
+            # fails outside the main thread, where the master agent runs agents
+            self.model = run_with_timeout(self._create_model, 30, SentenceTransformer)
 
-            self.model = SentenceTransformer('all-MiniLM-L6-v2', local_files_only=True)
-
-            signal.alarm(0)  # Cancel alarm
+            # The themes never change, so they are encoded once per model load
+            self._theme_embeddings = self._encode(THEMES)
 
         except Exception as e:
             print(f"Failed to load NLP model: {e}")
             self.model = None
 
+    def _create_model(self, model_class):
+        """Prefer the int8 ONNX Runtime model on CPU, falling back to the PyTorch one"""
+        try:
+            # Needs sentence-transformers>=3.2 with onnxruntime, and the ONNX file in the local cache
+            return model_class(MODEL_NAME, backend='onnx', local_files_only=True,
+                               model_kwargs={'file_name': ONNX_INT8_FILE})
+        except Exception as e:
+            print(f"Quantized ONNX model unavailable, using PyTorch: {e}")
+            return model_class(MODEL_NAME, local_files_only=True)
+
+    def _encode(self, texts):
+        """Encode texts in one batch as unit-length vectors, so cosine similarity is a dot product"""
+        return self.model.encode(list(texts), batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+
     def analyze(self, query):
         """
         Analyze literature using NLP techniques
@@ -95,42 +130,35 @@ class NLPAnalysisAgent:
 
     def _analyze_with_model(self, query, abstracts):
         """Analyze abstracts using the NLP model"""
-        # Encode query and abstracts
-        query_embedding = self.model.encode([query])[0]
-        abstract_embeddings = self.model.encode(abstracts)
+        # Encode the query and each distinct abstract once, in one batched call,
+        # then expand back to one row per abstract
+        unique_abstracts = list(dict.fromkeys(abstracts))
+        positions = {text: i for i, text in enumerate(unique_abstracts)}
+        embeddings = self._encode([query] + unique_abstracts)
+        query_embedding = embeddings[0]
+        abstract_embeddings = embeddings[1:][[positions[text] for text in abstracts]]
 
         # Calculate similarities
-        similarities = np.dot(abstract_embeddings, query_embedding) / (
-            np.linalg.norm(abstract_embeddings, axis=1) * np.linalg.norm(query_embedding)
-        )
-
-        # Mock themes based on common drug discovery themes
-        themes = [
-            'clinical efficacy', 'safety profile', 'mechanism of action', 'drug resistance',
-            'pharmacokinetics', 'toxicity', 'biomarkers', 'combination therapy',
-            'patient outcomes', 'molecular targets'
-        ]
-
-        theme_scores = {}
-        theme_frequencies = {}
-
-        for theme in themes:
-            theme_embedding = self.model.encode([theme])[0]
-            theme_similarities = np.dot(abstract_embeddings, theme_embedding) / (
-                np.linalg.norm(abstract_embeddings, axis=1) * np.linalg.norm(theme_embedding)
-            )
-            theme_scores[theme] = float(np.mean(theme_similarities))  # Convert to Python float
-            theme_frequencies[theme] = int(np.sum(theme_similarities > 0.3))  # Convert to Python int
-
-        # Mock sentiment analysis
+        similarities = abstract_embeddings @ query_embedding
+        theme_similarities = abstract_embeddings @ self._theme_embeddings.T  # (abstracts, themes)
+
+        mean_scores = theme_similarities.mean(axis=0)
+        theme_scores = dict(zip(THEMES, mean_scores.tolist()))
+        theme_frequencies = dict(zip(THEMES, (theme_similarities > 0.3).sum(axis=0).tolist()))
+        # Stable descending order, matching sorted(..., reverse=True) on ties
+        ranked_themes = [THEMES[i] for i in np.argsort(-mean_scores, kind='stable')]
+
+        # Mock sentiment analysis: <= 0.2 negative, (0.2, 0.5] neutral, > 0.5 positive,
+        # bucketed and counted in one pass
+        counts = np.bincount(np.digitize(similarities, [0.2, 0.5], right=True), minlength=3)
         sentiment = {
-            'positive': np.sum(similarities > 0.5),
-            'neutral': np.sum((similarities <= 0.5) & (similarities > 0.2)),
-            'negative': len(abstracts) - np.sum(similarities > 0.2)
+            'positive': int(counts[2]),
+            'neutral': int(counts[1]),
+            'negative': int(counts[0])
         }
 
         return {
-            'themes': sorted(theme_scores.keys(), key=lambda x: theme_scores[x], reverse=True),
+            'themes': ranked_themes,
             'theme_scores': theme_scores,
             'theme_frequencies': theme_frequencies,
             'sentiment': sentiment
@@ -161,15 +189,4 @@ class NLPAnalysisAgent:
 
     def _get_mock_abstracts(self, query):
         """Generate mock research abstracts"""
-        templates = [
-            f"This study investigates the {query} compound in relation to therapeutic efficacy and safety profiles.",
-            f"Recent advances in {query} research show promising results for clinical applications.",
-            f"Molecular analysis of {query} reveals novel mechanisms of action against target proteins.",
-            f"Clinical trials demonstrate significant improvements in patient outcomes with {query} treatment.",
-            f"Pharmacokinetic studies of {query} indicate favorable drug distribution and metabolism.",
-            f"Toxicity assessment of {query} shows acceptable safety margins for therapeutic use.",
-            f"Biomarker discovery related to {query} treatment provides new diagnostic opportunities.",
-            f"Combination therapies involving {query} show synergistic effects in preclinical models."
-        ]
-
-        return templates * 3  # Repeat for more data
\ No newline at end of file
+        return [template.format(q=query) for template in _ABSTRACT_TEMPLATES] * 3  # Repeat for more data
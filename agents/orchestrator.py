@@ -0,0 +1,58 @@
+"""
+Concurrent fan-out of independent agent analyses for async callers
+"""
+
+import asyncio
+from .clinical_agent import ClinicalAgent
+from .exim_agent import EXIMAgent
+from .internal_agent import InternalAgent
+from .literature_agent import LiteratureAgent
+from .patent_agent import PatentAgent
+from .web_agent import WebAgent
+from utils.robust_utils import logger, create_error_response
+
+_default_agents = None
+
+def _get_default_agents():
+    """Create the data/literature/API agents on first use"""
+    global _default_agents
+    if _default_agents is None:
+        _default_agents = {
+            'clinical': ClinicalAgent(),
+            'exim': EXIMAgent(),
+            'internal': InternalAgent(),
+            'literature': LiteratureAgent(),
+            'patent': PatentAgent(),
+            'web': WebAgent()
+        }
+    return _default_agents
+
+async def _run_agent(name, agent, query):
+    """Await the agent's analyze_async(), or run its blocking analyze() in a worker thread"""
+    try:
+        if hasattr(agent, 'analyze_async'):
+            return await agent.analyze_async(query)
+        return await asyncio.to_thread(agent.analyze, query)
+    except Exception as e:
+        logger.error(f"Agent {name} failed: {e}")
+        return create_error_response(name, e)
+
+async def analyze_all(query, agents=None):
+    """
+    Run every agent's analysis of query concurrently
+
+    The agents are independent and mostly wait on I/O, so total latency is
+    that of the slowest agent rather than the sum of all of them.
+
+    Args:
+        query: The query to analyze
+        agents: Mapping of agent name to agent; defaults to the clinical,
+            EXIM, internal, literature, patent and web agents
+
+    Returns:
+        Dict of agent name to result, in the order of agents
+    """
+    agents = agents if agents is not None else _get_default_agents()
+    names = list(agents)
+    results = await asyncio.gather(*(_run_agent(name, agents[name], query) for name in names))
+    return dict(zip(names, results))
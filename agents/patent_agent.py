@@ -1,7 +1,17 @@
+import numpy as np
 import pandas as pd
-import requests
 import os
-from datetime import datetime
+import asyncio
+from collections import Counter
+from functools import lru_cache
+from utils.data_loader import load_table, to_records
+from ._http import SESSION, ASYNC_HTTP, get_json_async
+
+_DATE_COLUMNS = ['Filing Date', 'Expiry Date']
+
+# Common pharmaceutical companies used as mock assignees
+_MOCK_ASSIGNEES = ('Pfizer', 'Merck', 'Novartis', 'AstraZeneca', 'Johnson & Johnson',
+                   'Bristol Myers Squibb', 'Eli Lilly', 'AbbVie', 'Gilead Sciences', 'Bayer')
 
 class PatentAgent:
     def __init__(self):
@@ -10,6 +20,13 @@ class PatentAgent:
         # Fallback to local data
         self.data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'patent_data.csv')
         self.use_api = os.getenv('USE_API', 'false').lower() == 'true'
+        # Parsed data is cached and only reloaded when the file changes
+        self._df = None
+        self._mol_lower = None
+        self._name_index = {}
+        self._mtime = None
+        # Row positions per lowercased query, cleared whenever the data reloads
+        self._query_matches = lru_cache(maxsize=128)(self._find_matches)
 
     def analyze(self, query):
         """
@@ -23,60 +40,112 @@ class PatentAgent:
 
     def _analyze_from_api(self, query):
         try:
-            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
-            params = {'query': query, 'type': 'patent_landscape'}
-            response = requests.get(self.api_url, headers=headers, params=params, timeout=10)
+            response = SESSION.get(self.api_url, headers=self._api_headers(), params=self._api_params(query), timeout=10)
             response.raise_for_status()
-            data = response.json()
-
-            # Check if API returned meaningful data
-            if data.get('data') or data.get('insights'):
-                insights = data.get('insights', f"Patent landscape for '{query}' from API")
-                return {
-                    'agent': 'Patent Landscape',
-                    'insights': insights,
-                    'data': data.get('data', []),
-                    'charts': data.get('charts', {})
-                }
-            else:
-                # API returned empty data, fall back to local
-                return self._analyze_from_file(query)
+            # API returned empty data, fall back to local
+            return self._result_from_api(query, response.json()) or self._analyze_from_file(query)
         except Exception as e:
             # API failed, fall back to local
             return self._analyze_from_file(query)
 
+    async def analyze_async(self, query):
+        """
+        Async variant of analyze() for callers running an event loop
+
+        With aiohttp installed the API request is awaited directly, so
+        concurrent agents don't each hold a worker thread while waiting on it.
+        """
+        if not (self.use_api and ASYNC_HTTP):
+            return await asyncio.to_thread(self.analyze, query)
+        try:
+            data = await get_json_async(self.api_url, headers=self._api_headers(), params=self._api_params(query), timeout=10)
+            result = self._result_from_api(query, data)
+        except Exception:
+            result = None
+        # API failed or returned empty data, fall back to local
+        return result or await asyncio.to_thread(self._analyze_from_file, query)
+
+    def _api_headers(self):
+        return {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+
+    def _api_params(self, query):
+        return {'query': query, 'type': 'patent_landscape'}
+
+    def _result_from_api(self, query, data):
+        """Build the result from an API response, or None when it has no data"""
+        # Check if API returned meaningful data
+        if data.get('data') or data.get('insights'):
+            insights = data.get('insights', f"Patent landscape for '{query}' from API")
+            return {
+                'agent': 'Patent Landscape',
+                'insights': insights,
+                'data': data.get('data', []),
+                'charts': data.get('charts', {})
+            }
+        return None
+
+    def _load(self):
+        """Load the patent data once, reloading only when the file changes on disk"""
+        mtime = os.path.getmtime(self.data_path)
+        if self._df is None or mtime != self._mtime:
+            # Dates parsed and repeated labels stored as categories, kept in a Parquet copy
+            self._df = load_table(self.data_path, categories=['Status', 'Assignee'],
+                                  parse_dates=_DATE_COLUMNS, dtype={'Molecule': 'string'})
+            # Kept beside the frame rather than as a column, so it never leaks into the records
+            self._mol_lower = self._df['Molecule'].str.lower()
+            # Inverted index: each distinct molecule name -> the rows it appears in
+            name_rows = {}
+            for position, name in enumerate(self._mol_lower.tolist()):
+                if isinstance(name, str):  # Skip missing molecules
+                    name_rows.setdefault(name, []).append(position)
+            self._name_index = {name: np.array(rows, dtype=np.intp) for name, rows in name_rows.items()}
+            self._query_matches.cache_clear()
+            self._mtime = mtime
+        return self._df
+
+    def _find_matches(self, query_lower):
+        """Return the row positions whose molecule contains query_lower"""
+        # Substring test once per distinct name instead of once per row
+        hits = [rows for name, rows in self._name_index.items() if query_lower in name]
+        positions = np.sort(np.concatenate(hits)) if hits else np.empty(0, dtype=np.intp)
+        positions.flags.writeable = False  # Shared through the cache
+        return positions
+
     def _analyze_from_file(self, query):
         # Original file-based logic
-        self.data = pd.read_csv(self.data_path)
-        self.data['Filing Date'] = pd.to_datetime(self.data['Filing Date'])
-        self.data['Expiry Date'] = pd.to_datetime(self.data['Expiry Date'])
+        self.data = self._load()
         query_lower = query.lower()
-        matching_rows = self.data[self.data['Molecule'].str.lower().str.contains(query_lower, na=False)]
+        matching_rows = self.data.iloc[self._query_matches(query_lower)]
 
         if not matching_rows.empty:
-            active_patents = matching_rows[matching_rows['Status'] == 'Active']
-            expired_patents = matching_rows[matching_rows['Status'] == 'Expired']
+            # One pass over Status for both counts
+            status_counts = matching_rows['Status'].value_counts()
+            is_active = matching_rows['Status'] == 'Active'
             assignees = matching_rows['Assignee'].unique().tolist()
 
             insights = f"Patent landscape for {query}: "
-            insights += f"{len(active_patents)} active patents, "
-            insights += f"{len(expired_patents)} expired patents, "
+            insights += f"{int(status_counts.get('Active', 0))} active patents, "
+            insights += f"{int(status_counts.get('Expired', 0))} expired patents, "
             insights += f"Key assignees: {', '.join(assignees)}"
 
-            # Check upcoming expiries
-            now = datetime.now()
-            upcoming_expiries = active_patents[active_patents['Expiry Date'] > now]
-            upcoming_expiries = upcoming_expiries[upcoming_expiries['Expiry Date'] <= now.replace(year=now.year + 5)]
-            if not upcoming_expiries.empty:
-                insights += f", {len(upcoming_expiries)} patents expiring within 5 years"
-
-            data = matching_rows.to_dict('records')
+            # Check upcoming expiries with a single combined mask
+            now = pd.Timestamp.now()
+            expiry = matching_rows['Expiry Date']
+            expiring_soon = int((is_active & (expiry > now) & (expiry <= now + pd.DateOffset(years=5))).sum())
+            if expiring_soon:
+                insights += f", {expiring_soon} patents expiring within 5 years"
+
+            # Dates formatted per column, matching the mock records
+            data = to_records(matching_rows.assign(**{
+                column: matching_rows[column].dt.strftime('%Y-%m-%d') for column in _DATE_COLUMNS
+            }))
         else:
             # Generate mock patent data relevant to the query
             mock_patents = self._generate_mock_patents(query)
-            active_count = len([p for p in mock_patents if p['Status'] == 'Active'])
-            expired_count = len([p for p in mock_patents if p['Status'] == 'Expired'])
-            assignees = list(set(p['Assignee'] for p in mock_patents))
+            status_counts = Counter(p['Status'] for p in mock_patents)
+            active_count = status_counts['Active']
+            expired_count = status_counts['Expired']
+            assignees = list(dict.fromkeys(p['Assignee'] for p in mock_patents))
 
             insights = f"Patent landscape for '{query}': "
             insights += f"{active_count} active patents, "
@@ -101,36 +170,29 @@ class PatentAgent:
 
     def _generate_mock_patents(self, query):
         """Generate mock patent data for the query"""
-        import random
-        from datetime import datetime, timedelta
-
-        patents = []
-        num_patents = random.randint(3, 8)
-
-        # Common pharmaceutical companies
-        companies = ['Pfizer', 'Merck', 'Novartis', 'AstraZeneca', 'Johnson & Johnson',
-                    'Bristol Myers Squibb', 'Eli Lilly', 'AbbVie', 'Gilead Sciences', 'Bayer']
-
-        for i in range(num_patents):
-            # Generate patent number
-            patent_num = f'US{random.randint(8000000, 9999999)}'
-
-            # Filing date: 5-20 years ago
-            filing_date = datetime.now() - timedelta(days=random.randint(365*5, 365*20))
-            expiry_date = filing_date + timedelta(days=365*20)  # 20 year term
-
-            # Status: mostly active for newer drugs
-            status = 'Active' if random.random() > 0.3 else 'Expired'
-
-            assignee = random.choice(companies)
-
-            patents.append({
+        rng = np.random.default_rng()
+        num_patents = int(rng.integers(3, 9))
+
+        # All random fields drawn in one vector call each
+        patent_nums = rng.integers(8000000, 10000000, size=num_patents)
+        # Filing date: 5-20 years ago, 20 year term
+        filing_offsets = rng.integers(365*5, 365*20, endpoint=True, size=num_patents)
+        filing_dates = pd.Timestamp.now() - pd.to_timedelta(filing_offsets, unit='D')
+        expiry_dates = filing_dates + pd.Timedelta(days=365*20)
+        # Status: mostly active for newer drugs
+        statuses = np.where(rng.random(num_patents) > 0.3, 'Active', 'Expired')
+        assignees = rng.choice(_MOCK_ASSIGNEES, size=num_patents)
+
+        return [
+            {
                 'Molecule': query,
-                'Patent Number': patent_num,
-                'Filing Date': filing_date.strftime('%Y-%m-%d'),
+                'Patent Number': f'US{patent_num}',
+                'Filing Date': filing_date,
                 'Status': status,
-                'Expiry Date': expiry_date.strftime('%Y-%m-%d'),
+                'Expiry Date': expiry_date,
                 'Assignee': assignee
-            })
-
-        return patents
+            }
+            for patent_num, filing_date, status, expiry_date, assignee in zip(
+                patent_nums.tolist(), filing_dates.strftime('%Y-%m-%d').tolist(), statuses.tolist(),
+                expiry_dates.strftime('%Y-%m-%d').tolist(), assignees.tolist())
+        ]
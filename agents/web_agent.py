@@ -1,6 +1,46 @@
-import requests
 import random
+import asyncio
 import os
+from ._http import SESSION, ASYNC_HTTP, get_json_async
+
+# Mock web sources, keyed by lowercase molecule name; built once at import
+_MOCK_SOURCES = {
+    'remdesivir': (
+        {'title': 'FDA Approves Remdesivir for COVID-19', 'source': 'FDA.gov', 'date': '2020-10-22'},
+        {'title': 'Remdesivir Patent Updates', 'source': 'USPTO', 'date': '2023-05-15'},
+        {'title': 'Market Analysis: Antiviral Drugs', 'source': 'PharmaNews', 'date': '2023-08-10'}
+    ),
+    'pembrolizumab': (
+        {'title': 'Keytruda Shows Promise in Lung Cancer', 'source': 'ASCO', 'date': '2023-06-05'},
+        {'title': 'Merck Announces Patent Extension', 'source': 'Merck.com', 'date': '2023-07-20'},
+        {'title': 'Immunotherapy Market Growth', 'source': 'BioSpace', 'date': '2023-09-15'}
+    ),
+    'insulin': (
+        {'title': 'New Insulin Formulations Approved', 'source': 'EMA', 'date': '2023-04-12'},
+        {'title': 'Diabetes Treatment Guidelines Updated', 'source': 'ADA', 'date': '2023-01-01'},
+        {'title': 'Biosimilar Insulin Market', 'source': 'PharmExec', 'date': '2023-11-08'}
+    ),
+    'morphine': (
+        {'title': 'Opioid Crisis: Morphine Regulation Updates', 'source': 'CDC.gov', 'date': '2023-09-01'},
+        {'title': 'Morphine Patent Expiry Analysis', 'source': 'PharmaIntel', 'date': '2023-06-20'},
+        {'title': 'Pain Management Market Trends', 'source': 'Medscape', 'date': '2023-10-15'}
+    ),
+    'bivalirudin': (
+        {'title': 'Bivalirudin vs Heparin in PCI: Latest Evidence', 'source': 'NEJM', 'date': '2023-08-25'},
+        {'title': 'Anticoagulant Market Analysis 2023', 'source': 'PharmaMarket', 'date': '2023-07-10'},
+        {'title': 'Bivalirudin Patent Status Update', 'source': 'USPTO', 'date': '2023-05-30'}
+    )
+}
+
+# Generic sources for queries without mock entries, as (title template, source, date)
+_GENERIC_SOURCES = (
+    ('General Guidelines for {q}', 'WHO', '2023-10-01'),
+    ('Industry News on {q}', 'PharmaTimes', '2023-09-20'),
+    ('Regulatory Updates for {q}', 'FDA', '2023-08-15')
+)
+
+_INSIGHTS_TEMPLATE = ("Web intelligence for '{q}': Found {count} relevant sources including "
+                      "regulatory updates, news, and guidelines.")
 
 class WebAgent:
     def __init__(self):
@@ -20,74 +60,62 @@ class WebAgent:
 
     def _analyze_from_api(self, query):
         try:
-            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
-            params = {'query': query, 'type': 'web_intelligence'}
-            response = requests.get(self.api_url, headers=headers, params=params, timeout=10)
+            response = SESSION.get(self.api_url, headers=self._api_headers(), params=self._api_params(query), timeout=10)
             response.raise_for_status()
-            data = response.json()
-
-            # Check if API returned meaningful data
-            if data.get('data') or data.get('insights'):
-                insights = data.get('insights', f"Web intelligence for '{query}' from API")
-                return {
-                    'agent': 'Web Intelligence',
-                    'insights': insights,
-                    'data': data.get('data', []),
-                    'charts': {}
-                }
-            else:
-                # API returned empty data, fall back to mock
-                return self._analyze_from_mock(query)
+            # API returned empty data, fall back to mock
+            return self._result_from_api(query, response.json()) or self._analyze_from_mock(query)
         except Exception as e:
             # API failed, fall back to mock
             return self._analyze_from_mock(query)
 
-    def _analyze_from_mock(self, query):
-        # Mock web sources
-        mock_sources = {
-            'remdesivir': [
-                {'title': 'FDA Approves Remdesivir for COVID-19', 'source': 'FDA.gov', 'date': '2020-10-22'},
-                {'title': 'Remdesivir Patent Updates', 'source': 'USPTO', 'date': '2023-05-15'},
-                {'title': 'Market Analysis: Antiviral Drugs', 'source': 'PharmaNews', 'date': '2023-08-10'}
-            ],
-            'pembrolizumab': [
-                {'title': 'Keytruda Shows Promise in Lung Cancer', 'source': 'ASCO', 'date': '2023-06-05'},
-                {'title': 'Merck Announces Patent Extension', 'source': 'Merck.com', 'date': '2023-07-20'},
-                {'title': 'Immunotherapy Market Growth', 'source': 'BioSpace', 'date': '2023-09-15'}
-            ],
-            'insulin': [
-                {'title': 'New Insulin Formulations Approved', 'source': 'EMA', 'date': '2023-04-12'},
-                {'title': 'Diabetes Treatment Guidelines Updated', 'source': 'ADA', 'date': '2023-01-01'},
-                {'title': 'Biosimilar Insulin Market', 'source': 'PharmExec', 'date': '2023-11-08'}
-            ],
-            'morphine': [
-                {'title': 'Opioid Crisis: Morphine Regulation Updates', 'source': 'CDC.gov', 'date': '2023-09-01'},
-                {'title': 'Morphine Patent Expiry Analysis', 'source': 'PharmaIntel', 'date': '2023-06-20'},
-                {'title': 'Pain Management Market Trends', 'source': 'Medscape', 'date': '2023-10-15'}
-            ],
-            'bivalirudin': [
-                {'title': 'Bivalirudin vs Heparin in PCI: Latest Evidence', 'source': 'NEJM', 'date': '2023-08-25'},
-                {'title': 'Anticoagulant Market Analysis 2023', 'source': 'PharmaMarket', 'date': '2023-07-10'},
-                {'title': 'Bivalirudin Patent Status Update', 'source': 'USPTO', 'date': '2023-05-30'}
-            ]
-        }
+    async def analyze_async(self, query):
+        """
+        Async variant of analyze() for callers running an event loop
 
-        query_lower = query.lower()
-        relevant_sources = []
+        With aiohttp installed the API request is awaited directly, so
+        concurrent agents don't each hold a worker thread while waiting on it.
+        """
+        if not (self.use_api and ASYNC_HTTP):
+            return await asyncio.to_thread(self.analyze, query)
+        try:
+            data = await get_json_async(self.api_url, headers=self._api_headers(), params=self._api_params(query), timeout=10)
+            result = self._result_from_api(query, data)
+        except Exception:
+            result = None
+        # API failed or returned empty data, fall back to mock
+        return result or await asyncio.to_thread(self._analyze_from_mock, query)
+
+    def _api_headers(self):
+        return {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+
+    def _api_params(self, query):
+        return {'query': query, 'type': 'web_intelligence'}
 
-        for key, sources in mock_sources.items():
-            if key in query_lower:
-                relevant_sources.extend(sources)
+    def _result_from_api(self, query, data):
+        """Build the result from an API response, or None when it has no data"""
+        # Check if API returned meaningful data
+        if data.get('data') or data.get('insights'):
+            insights = data.get('insights', f"Web intelligence for '{query}' from API")
+            return {
+                'agent': 'Web Intelligence',
+                'insights': insights,
+                'data': data.get('data', []),
+                'charts': {}
+            }
+        return None
+
+    def _analyze_from_mock(self, query):
+        query_lower = query.lower()
+        # Copies, so callers can't modify the shared mock entries
+        relevant_sources = [dict(source) for key, sources in _MOCK_SOURCES.items()
+                            if key in query_lower for source in sources]
 
         if not relevant_sources:
             # Generic web intelligence
-            relevant_sources = [
-                {'title': f'General Guidelines for {query}', 'source': 'WHO', 'date': '2023-10-01'},
-                {'title': f'Industry News on {query}', 'source': 'PharmaTimes', 'date': '2023-09-20'},
-                {'title': f'Regulatory Updates for {query}', 'source': 'FDA', 'date': '2023-08-15'}
-            ]
+            relevant_sources = [{'title': title.format(q=query), 'source': source, 'date': date}
+                                for title, source, date in _GENERIC_SOURCES]
 
-        insights = f"Web intelligence for '{query}': Found {len(relevant_sources)} relevant sources including regulatory updates, news, and guidelines."
+        insights = _INSIGHTS_TEMPLATE.format(q=query, count=len(relevant_sources))
 
         return {
             'agent': 'Web Intelligence',
@@ -1,9 +1,12 @@
 from flask import Flask, render_template, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 import time
 import uuid
 import os
-import io
-import traceback
+import tempfile
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Import our robust utilities
@@ -14,13 +17,37 @@ from utils.robust_utils import (
 )
 from agents.master_agent import MasterAgent
 from utils.pdf_generator import PDFGenerator
+from utils.cache import hash_key
 
 # Initialize Flask app with config
 app = Flask(__name__)
-app.config.update({
-    'SECRET_KEY': config.get('app', 'secret_key'),
-    'DEBUG': config.get('app', 'debug')
-})
+app.config['SECRET_KEY'] = config.secret_key
+app.config['DEBUG'] = bool(config.debug)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson, keeping Flask's output for other types"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            # response() asks for indentation when pretty-printing in debug mode
+            option |= orjson.OPT_INDENT_2
+        # Dates and anything else orjson can't encode go through Flask's usual default
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# orjson is optional; without it Flask's stdlib json provider is used
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 
 # Initialize components with error handling
 try:
@@ -37,31 +64,53 @@ except Exception as e:
     logger.error(f"Failed to initialize PDF generator: {e}")
     pdf_generator = None
 
-# Store analysis jobs with cleanup
-jobs = {}
+# Analyses run here, off the request threads; the pool size bounds concurrent jobs
+executor = ThreadPoolExecutor(max_workers=config.get('app', 'max_workers', 4), thread_name_prefix='analysis')
+
+# Store analysis jobs with cleanup, in creation order so the oldest are at the front
+jobs = OrderedDict()
 MAX_JOBS = 100
+# Reports up to this size are built in memory before spilling to disk
+PDF_SPOOL_MAX_BYTES = 1024 * 1024
+JOB_TTL_SECONDS = 3600
+# Completed results never change, so browsers may reuse them for this long
+RESULT_CACHE_MAX_AGE = 300
 
 def cleanup_old_jobs():
     """Clean up old completed jobs"""
-    current_time = time.time()
-    to_remove = []
-
-    for job_id, job in jobs.items():
-        # Remove jobs older than 1 hour
-        if current_time - job.get('created_at', 0) > 3600:
-            to_remove.append(job_id)
-
-    for job_id in to_remove:
-        del jobs[job_id]
+    cutoff = time.time() - JOB_TTL_SECONDS
+
+    # Remove jobs older than 1 hour; only the expired prefix is visited
+    while jobs:
+        job_id, job = next(iter(jobs.items()))
+        if job.get('created_at', 0) > cutoff:
+            break
+        jobs.popitem(last=False)
         logger.debug(f"Cleaned up old job: {job_id}")
 
-    # Limit total jobs
-    if len(jobs) > MAX_JOBS:
-        # Remove oldest jobs
-        sorted_jobs = sorted(jobs.items(), key=lambda x: x[1].get('created_at', 0))
-        for job_id, _ in sorted_jobs[:len(jobs) - MAX_JOBS]:
-            del jobs[job_id]
-            logger.debug(f"Removed excess job: {job_id}")
+    # Limit total jobs by removing the oldest
+    while len(jobs) > MAX_JOBS:
+        job_id, _ = jobs.popitem(last=False)
+        logger.debug(f"Removed excess job: {job_id}")
+
+def job_etag(job_id, job, representation):
+    """ETag for one representation of a completed job, fixed once the job is finalized"""
+    return hash_key((job_id, job.get('finalized_at'), representation))
+
+def not_modified(etag):
+    """Return a 304 response if the client already has etag, else None"""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def cacheable(response, etag):
+    """Tag a completed job's response so repeat fetches can be answered with a 304"""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = RESULT_CACHE_MAX_AGE
+    return response
 
 @app.route('/')
 def index():
@@ -106,57 +155,69 @@ def analyze():
             'analysis_type': analysis_type
         }
 
-        logger.info(f"Starting analysis job {job_id} for query: {query[:50]}...")
-
-        # Run analysis with error handling
-        def progress_callback(message, progress):
-            jobs[job_id]['progress'] = min(100, max(0, progress * 100))
-            jobs[job_id]['status'] = message
-            logger.debug(f"Job {job_id} progress: {progress:.1%} - {message}")
+        # Repeat queries complete immediately instead of queueing a job
+        cached = master_agent.get_cached_analysis(query, analysis_type)
+        if cached is not None:
+            complete_job(jobs[job_id], *cached)
+            logger.info(f"Analysis job {job_id} served from cache")
+            return jsonify({'job_id': job_id})
 
-        try:
-            results, summary = master_agent.run_analysis(query, analysis_type, progress_callback)
-
-            # Validate and clean results
-            cleaned_results = {}
-            for agent_name, result in results.items():
-                try:
-                    cleaned_results[agent_name] = validate_data_structure(result)
-                except Exception as e:
-                    logger.warning(f"Failed to validate result for {agent_name}: {e}")
-                    cleaned_results[agent_name] = create_error_response(agent_name, e)
-
-            jobs[job_id].update({
-                'status': 'completed',
-                'progress': 100,
-                'results': cleaned_results,
-                'summary': summary
-            })
-
-            logger.info(f"Analysis job {job_id} completed successfully")
+        logger.info(f"Starting analysis job {job_id} for query: {query[:50]}...")
 
-        except Exception as e:
-            logger.error(f"Analysis job {job_id} failed: {e}")
-            jobs[job_id].update({
-                'status': 'error',
-                'progress': 0,
-                'error': str(e)
-            })
-            return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+        # Run in the background; the client polls /status and then fetches /results
+        jobs[job_id]['future'] = executor.submit(run_job, jobs[job_id], job_id, query, analysis_type)
 
         return jsonify({'job_id': job_id})
 
     except Exception as e:
-        logger.error(f"Unexpected error in analyze endpoint: {e}")
-        logger.error(traceback.format_exc())
+        # The traceback is only formatted when debug logging is on
+        logger.error(f"Unexpected error in analyze endpoint: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         return jsonify({'error': 'Internal server error'}), 500
-        jobs[job_id]['summary'] = summary
-        jobs[job_id]['progress'] = 1.0
-    except Exception as e:
-        jobs[job_id]['status'] = 'error'
-        jobs[job_id]['error'] = str(e)
 
-    return jsonify({'job_id': job_id})
+def complete_job(job, results, summary):
+    """Validate agent results and mark the job as completed"""
+    # Validate and clean results
+    cleaned_results = {}
+    for agent_name, result in results.items():
+        try:
+            cleaned_results[agent_name] = validate_data_structure(result)
+        except Exception as e:
+            logger.warning(f"Failed to validate result for {agent_name}: {e}")
+            cleaned_results[agent_name] = create_error_response(agent_name, e)
+
+    job.update({
+        'status': 'completed',
+        'progress': 100,
+        'results': cleaned_results,
+        'summary': summary,
+        # Already cleaned above, so /results can return them as they are
+        'validated': True,
+        'finalized_at': time.time()
+    })
+
+def run_job(job, job_id, query, analysis_type):
+    """Run one analysis job, recording progress and results on its job dict"""
+    # The job dict is held directly, so cleanup evicting it can't break the run
+
+    # Run analysis with error handling
+    def progress_callback(message, progress):
+        job['progress'] = min(100, max(0, progress * 100))
+        job['status'] = message
+        logger.debug(f"Job {job_id} progress: {progress:.1%} - {message}")
+
+    try:
+        results, summary = master_agent.run_analysis(query, analysis_type, progress_callback)
+        complete_job(job, results, summary)
+
+        logger.info(f"Analysis job {job_id} completed successfully")
+
+    except Exception as e:
+        logger.error(f"Analysis job {job_id} failed: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+        job.update({
+            'status': 'error',
+            'progress': 0,
+            'error': f'Analysis failed: {str(e)}'
+        })
 
 @app.route('/status/<job_id>')
 def status(job_id):
@@ -167,6 +228,11 @@ def status(job_id):
 
         job = jobs[job_id]
 
+        # A worker that died without recording an outcome still ends the job
+        future = job.get('future')
+        if future is not None and future.done() and job.get('status') not in ('completed', 'error'):
+            job.update({'status': 'error', 'progress': 0, 'error': f'Analysis failed: {future.exception()}'})
+
         # Ensure progress is a valid number
         progress = job.get('progress', 0)
         if not isinstance(progress, (int, float)) or progress < 0 or progress > 100:
@@ -184,7 +250,7 @@ def status(job_id):
         return jsonify(response)
 
     except Exception as e:
-        logger.error(f"Error in status endpoint for job {job_id}: {e}")
+        logger.error(f"Error in status endpoint for job {job_id}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         return jsonify({'error': 'Internal server error', 'status': 'error'}), 500
 
 @app.route('/results/<job_id>')
@@ -206,20 +272,29 @@ def results(job_id):
         if 'results' not in job or job['results'] is None:
             return jsonify({'error': 'No results available'}), 500
 
-        # Validate results before returning
-        try:
-            validated_results = validate_data_structure(job['results'])
-        except Exception as e:
-            logger.error(f"Failed to validate results for job {job_id}: {e}")
-            return jsonify({'error': 'Results validation failed'}), 500
-
-        return jsonify({
+        # Repeat fetches of the same results skip validation and encoding
+        etag = job_etag(job_id, job, 'json')
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        # Validate results before returning, unless complete_job already did
+        if job.get('validated'):
+            validated_results = job['results']
+        else:
+            try:
+                validated_results = validate_data_structure(job['results'])
+            except Exception as e:
+                logger.error(f"Failed to validate results for job {job_id}: {e}")
+                return jsonify({'error': 'Results validation failed'}), 500
+
+        return cacheable(jsonify({
             'results': validated_results,
             'summary': job.get('summary', 'No summary available')
-        })
+        }), etag)
 
     except Exception as e:
-        logger.error(f"Error in results endpoint for job {job_id}: {e}")
+        logger.error(f"Error in results endpoint for job {job_id}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/download/<job_id>')
@@ -240,28 +315,46 @@ def download(job_id):
         if pdf_generator is None:
             return jsonify({'error': 'PDF generation not available'}), 503
 
+        # Repeat downloads skip rebuilding the report
+        etag = job_etag(job_id, job, 'pdf')
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
         # Get query from job data
         query = job.get('query', 'Drug Discovery Analysis')
 
         # Generate PDF with error handling
         try:
-            pdf_buffer = io.BytesIO()
-            pdf_generator.generate_report(query, job['results'], job.get('summary', ''), pdf_buffer)
-            pdf_buffer.seek(0)
-
-            return send_file(
-                pdf_buffer,
-                as_attachment=True,
-                download_name=f'drug_discovery_report_{job_id}.pdf',
-                mimetype='application/pdf'
-            )
+            # Small reports stay in memory, large ones spill to a temp file
+            pdf_buffer = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES, mode='w+b')
+            try:
+                pdf_generator.generate_report(query, job['results'], job.get('summary', ''), pdf_buffer)
+                pdf_size = pdf_buffer.tell()
+                pdf_buffer.seek(0)
+
+                response = send_file(
+                    pdf_buffer,
+                    as_attachment=True,
+                    download_name=f'drug_discovery_report_{job_id}.pdf',
+                    mimetype='application/pdf'
+                )
+                # send_file can only size BytesIO objects itself
+                response.content_length = pdf_size
+                cacheable(response, etag)
+            except Exception:
+                pdf_buffer.close()
+                raise
+            # Streamed in chunks; closed (and any spill file deleted) once sent
+            response.call_on_close(pdf_buffer.close)
+            return response
 
         except Exception as pdf_error:
             logger.error(f"PDF generation failed for job {job_id}: {pdf_error}")
             return jsonify({'error': 'PDF generation failed'}), 500
 
     except Exception as e:
-        logger.error(f"Error in download endpoint for job {job_id}: {e}")
+        logger.error(f"Error in download endpoint for job {job_id}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/health')
@@ -272,7 +365,7 @@ def health():
         status_code = 200 if health_status['overall'] == 'healthy' else 503
         return jsonify(health_status), status_code
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error(f"Health check failed: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         return jsonify({
             'overall': 'error',
             'error': str(e),
@@ -286,17 +379,17 @@ def get_config():
         # Return safe config info
         safe_config = {
             'app': {
-                'host': config.get('app', 'host'),
-                'port': config.get('app', 'port'),
-                'debug': config.get('app', 'debug')
+                'host': config.host,
+                'port': config.port,
+                'debug': config.debug
             },
             'ml': {
-                'enable_ml_prediction': config.is_ml_enabled('prediction'),
-                'enable_generative_ai': config.is_ml_enabled('generative_ai'),
-                'enable_nlp_analysis': config.is_ml_enabled('nlp_analysis'),
+                'enable_ml_prediction': config.ml_prediction_enabled,
+                'enable_generative_ai': config.generative_ai_enabled,
+                'enable_nlp_analysis': config.nlp_analysis_enabled,
                 'max_memory_gb': config.get_memory_limit()
             },
-            'agents_count': 10 if config.is_ml_enabled('prediction') else 7
+            'agents_count': 10 if config.ml_prediction_enabled else 7
         }
         return jsonify(safe_config)
     except Exception as e:
@@ -306,9 +399,9 @@ def get_config():
 if __name__ == '__main__':
     try:
         # Use config values
-        host = config.get('app', 'host', '0.0.0.0')
-        port = config.get('app', 'port', 5000)
-        debug = config.get('app', 'debug', True)
+        host = config.host
+        port = config.port
+        debug = config.debug
 
         logger.info(f"Starting Drug Discovery AI System on {host}:{port}")
         app.run(debug=debug, host=host, port=port)
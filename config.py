@@ -1,8 +1,52 @@
 import os
 import json
 import logging
+from functools import cached_property
 from pathlib import Path
 
+def _to_bool(value):
+    """Parse a boolean environment variable value"""
+    return value.lower() in ('true', '1', 'yes', 'on')
+
+# Env var -> (section, key, converter from the env string)
+_ENV_MAPPINGS = {
+    'FLASK_HOST': ('app', 'host', str),
+    'FLASK_PORT': ('app', 'port', int),
+    'FLASK_DEBUG': ('app', 'debug', _to_bool),
+    'SECRET_KEY': ('app', 'secret_key', str),
+    'MAX_WORKERS': ('app', 'max_workers', int),
+    'PUBMED_API_KEY': ('apis', 'pubmed_api_key', str),
+    'MARKET_API_URL': ('apis', 'market_api_url', str),
+    'MARKET_API_KEY': ('apis', 'market_api_key', str),
+    'EXIM_API_URL': ('apis', 'exim_api_url', str),
+    'EXIM_API_KEY': ('apis', 'exim_api_key', str),
+    'PATENT_API_URL': ('apis', 'patent_api_url', str),
+    'PATENT_API_KEY': ('apis', 'patent_api_key', str),
+    'CLINICAL_API_URL': ('apis', 'clinical_api_url', str),
+    'CLINICAL_API_KEY': ('apis', 'clinical_api_key', str),
+    'INTERNAL_API_URL': ('apis', 'internal_api_url', str),
+    'INTERNAL_API_KEY': ('apis', 'internal_api_key', str),
+    'WEB_API_URL': ('apis', 'web_api_url', str),
+    'WEB_API_KEY': ('apis', 'web_api_key', str),
+    'LITERATURE_API_URL': ('apis', 'literature_api_url', str),
+    'LITERATURE_API_KEY': ('apis', 'literature_api_key', str),
+    'ENABLE_ML_PREDICTION': ('ml', 'enable_ml_prediction', _to_bool),
+    'ENABLE_GENERATIVE_AI': ('ml', 'enable_generative_ai', _to_bool),
+    'ENABLE_NLP_ANALYSIS': ('ml', 'enable_nlp_analysis', _to_bool),
+    'MAX_MEMORY_GB': ('ml', 'max_memory_gb', float)
+}
+
+# (section, key) -> name of the cached_property reading it, dropped on set()
+_CACHED_SETTINGS = {
+    ('app', 'host'): 'host',
+    ('app', 'port'): 'port',
+    ('app', 'debug'): 'debug',
+    ('app', 'secret_key'): 'secret_key',
+    ('ml', 'enable_ml_prediction'): 'ml_prediction_enabled',
+    ('ml', 'enable_generative_ai'): 'generative_ai_enabled',
+    ('ml', 'enable_nlp_analysis'): 'nlp_analysis_enabled'
+}
+
 class Config:
     """Centralized configuration management for the drug discovery system"""
 
@@ -18,7 +62,8 @@ class Config:
                 "host": "0.0.0.0",
                 "port": 5000,
                 "debug": True,
-                "secret_key": "dev-secret-key-change-in-production"
+                "secret_key": "dev-secret-key-change-in-production",
+                "max_workers": 4
             },
             "apis": {
                 "market_api_url": "",
@@ -47,7 +92,9 @@ class Config:
             "data": {
                 "data_dir": str(self.base_dir / "data"),
                 "cache_dir": str(self.base_dir / "cache"),
-                "max_cache_age_hours": 24
+                "max_cache_age_hours": 24,
+                "result_cache_ttl_seconds": 300,
+                "agent_timeout_seconds": 120
             },
             "logging": {
                 "level": "INFO",
@@ -84,50 +131,13 @@ class Config:
 
     def _load_from_env(self):
         """Load configuration from environment variables"""
-        env_mappings = {
-            'FLASK_HOST': ('app', 'host'),
-            'FLASK_PORT': ('app', 'port'),
-            'FLASK_DEBUG': ('app', 'debug'),
-            'SECRET_KEY': ('app', 'secret_key'),
-            'PUBMED_API_KEY': ('apis', 'pubmed_api_key'),
-            'MARKET_API_URL': ('apis', 'market_api_url'),
-            'MARKET_API_KEY': ('apis', 'market_api_key'),
-            'EXIM_API_URL': ('apis', 'exim_api_url'),
-            'EXIM_API_KEY': ('apis', 'exim_api_key'),
-            'PATENT_API_URL': ('apis', 'patent_api_url'),
-            'PATENT_API_KEY': ('apis', 'patent_api_key'),
-            'CLINICAL_API_URL': ('apis', 'clinical_api_url'),
-            'CLINICAL_API_KEY': ('apis', 'clinical_api_key'),
-            'INTERNAL_API_URL': ('apis', 'internal_api_url'),
-            'INTERNAL_API_KEY': ('apis', 'internal_api_key'),
-            'WEB_API_URL': ('apis', 'web_api_url'),
-            'WEB_API_KEY': ('apis', 'web_api_key'),
-            'LITERATURE_API_URL': ('apis', 'literature_api_url'),
-            'LITERATURE_API_KEY': ('apis', 'literature_api_key'),
-            'ENABLE_ML_PREDICTION': ('ml', 'enable_ml_prediction'),
-            'ENABLE_GENERATIVE_AI': ('ml', 'enable_generative_ai'),
-            'ENABLE_NLP_ANALYSIS': ('ml', 'enable_nlp_analysis'),
-            'MAX_MEMORY_GB': ('ml', 'max_memory_gb')
-        }
-
-        for env_var, (section, key) in env_mappings.items():
-            value = os.getenv(env_var)
+        for env_var, (section, key, converter) in _ENV_MAPPINGS.items():
+            value = os.environ.get(env_var)
             if value is not None:
-                # Convert string values to appropriate types
-                if isinstance(self.config[section][key], bool):
-                    self.config[section][key] = value.lower() in ('true', '1', 'yes', 'on')
-                elif isinstance(self.config[section][key], int):
-                    try:
-                        self.config[section][key] = int(value)
-                    except ValueError:
-                        pass
-                elif isinstance(self.config[section][key], float):
-                    try:
-                        self.config[section][key] = float(value)
-                    except ValueError:
-                        pass
-                else:
-                    self.config[section][key] = value
+                try:
+                    self.config[section][key] = converter(value)
+                except ValueError:
+                    pass  # Keep the configured value when the env value is malformed
 
     def _save_config(self, config):
         """Save configuration to file"""
@@ -149,8 +159,38 @@ class Config:
         if section not in self.config:
             self.config[section] = {}
         self.config[section][key] = value
+        self.__dict__.pop(_CACHED_SETTINGS.get((section, key)), None)
         self._save_config(self.config)
 
+    # Frequently read settings, looked up once and then served as plain attributes
+    @cached_property
+    def host(self):
+        return self.get('app', 'host', '0.0.0.0')
+
+    @cached_property
+    def port(self):
+        return self.get('app', 'port', 5000)
+
+    @cached_property
+    def debug(self):
+        return self.get('app', 'debug', False)
+
+    @cached_property
+    def secret_key(self):
+        return self.get('app', 'secret_key')
+
+    @cached_property
+    def ml_prediction_enabled(self):
+        return self.is_ml_enabled('ml_prediction')
+
+    @cached_property
+    def generative_ai_enabled(self):
+        return self.is_ml_enabled('generative_ai')
+
+    @cached_property
+    def nlp_analysis_enabled(self):
+        return self.is_ml_enabled('nlp_analysis')
+
     def ensure_directories(self):
         """Ensure all required directories exist"""
         dirs_to_create = [
@@ -5,11 +5,18 @@ Handles all edge cases and ensures the system works in any environment
 """
 
 import os
+import re
+import errno
 import sys
 import time
 import socket
+import select
 import subprocess
 import signal
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import importlib.util
 from pathlib import Path
 
 # Add the project root to Python path
@@ -18,9 +25,25 @@ sys.path.insert(0, str(project_root))
 
 from config import config
 
+# How long the health check waits for the background network probe
+NETWORK_CHECK_WAIT_SECONDS = 0.1
+# How long start_app waits for the app to bind before reporting it started
+STARTUP_GRACE_SECONDS = 3
+# Interval between connection attempts while waiting for the app's port
+PORT_PROBE_INTERVAL = 0.1
+# How much of the app's output to show when it fails to start
+APP_OUTPUT_TAIL_BYTES = 8192
+# How long stale app processes get to exit after SIGTERM before SIGKILL
+KILL_GRACE_SECONDS = 3
+# Command lines of stale app processes, as matched by pkill -f
+APP_CMDLINE_RE = re.compile(r'python.*app\.py')
+
 class SystemHealthChecker:
     """Check system health and requirements"""
 
+    # Checks run by run_all_checks besides the network probe
+    LOCAL_CHECKS = ('check_python_version', 'check_dependencies', 'check_disk_space', 'check_memory')
+
     def __init__(self):
         self.issues = []
         self.warnings = []
@@ -28,8 +51,8 @@ class SystemHealthChecker:
     def check_python_version(self):
         """Check Python version compatibility"""
         version = sys.version_info
-        if version < (3, 8):
-            self.issues.append(f"Python {version.major}.{version.minor} is too old. Requires Python 3.8+")
+        if version < (3, 9):
+            self.issues.append(f"Python {version.major}.{version.minor} is too old. Requires Python 3.9+")
         elif version < (3, 10):
             self.warnings.append(f"Python {version.major}.{version.minor} detected. Consider upgrading to 3.10+ for better performance")
 
@@ -40,12 +63,10 @@ class SystemHealthChecker:
             'requests', 'sklearn', 'torch', 'transformers', 'sentence_transformers'
         ]
 
-        missing_packages = []
-        for package in required_packages:
-            try:
-                __import__(package.replace('-', '_'))
-            except ImportError:
-                missing_packages.append(package)
+        # find_spec only locates each package; importing torch & co. here would
+        # cost seconds of startup in a process that never uses them
+        missing_packages = [package for package in required_packages
+                            if importlib.util.find_spec(package.replace('-', '_')) is None]
 
         if missing_packages:
             self.issues.append(f"Missing required packages: {', '.join(missing_packages)}")
@@ -54,12 +75,11 @@ class SystemHealthChecker:
     def check_disk_space(self):
         """Check available disk space"""
         try:
-            stat = os.statvfs(project_root)
-            free_gb = (stat.f_bavail * stat.f_frsize) / (1024**3)
+            free_gb = shutil.disk_usage(project_root).free / (1024**3)
             if free_gb < 1.0:
-                self.issues.append(".1f")
+                self.issues.append(f"Low disk space: {free_gb:.1f} GB free. At least 1 GB is required")
             elif free_gb < 5.0:
-                self.warnings.append(".1f")
+                self.warnings.append(f"Low disk space: {free_gb:.1f} GB free")
         except:
             pass  # Skip on systems where this doesn't work
 
@@ -69,9 +89,9 @@ class SystemHealthChecker:
             import psutil
             memory_gb = psutil.virtual_memory().available / (1024**3)
             if memory_gb < 2.0:
-                self.issues.append(".1f")
+                self.issues.append(f"Low memory: {memory_gb:.1f} GB available. At least 2 GB is required")
             elif memory_gb < 4.0:
-                self.warnings.append(".1f")
+                self.warnings.append(f"Low memory: {memory_gb:.1f} GB available")
         except ImportError:
             self.warnings.append("Could not check memory (psutil not installed)")
         except:
@@ -80,10 +100,23 @@ class SystemHealthChecker:
     def check_network(self):
         """Check network connectivity"""
         try:
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
+            socket.create_connection(("8.8.8.8", 53), timeout=3).close()
         except:
             self.warnings.append("No internet connection detected - some features may not work")
 
+    def start_network_check(self):
+        """Run check_network on a daemon thread; it only ever produces a warning"""
+        network_check = Future()
+        threading.Thread(target=lambda: network_check.set_result(self._run_check('check_network')),
+                         daemon=True).start()
+        return network_check
+
+    def _run_check(self, name):
+        """Run one check on a fresh checker and return its (issues, warnings)"""
+        checker = type(self)()
+        getattr(checker, name)()
+        return checker.issues, checker.warnings
+
     def check_port_availability(self, port):
         """Check if port is available"""
         try:
@@ -97,11 +130,20 @@ class SystemHealthChecker:
         """Run all health checks"""
         print("🔍 Running system health checks...")
 
-        self.check_python_version()
-        self.check_dependencies()
-        self.check_disk_space()
-        self.check_memory()
-        self.check_network()
+        # Probed while the local checks run, so an offline machine doesn't wait out the timeout
+        network_check = self.start_network_check()
+        # Local checks run concurrently; each reports into its own checker, merged in order
+        with ThreadPoolExecutor(max_workers=len(self.LOCAL_CHECKS)) as executor:
+            local_checks = [executor.submit(self._run_check, name) for name in self.LOCAL_CHECKS]
+        outcomes = [check.result() for check in local_checks]
+        try:
+            outcomes.append(network_check.result(timeout=NETWORK_CHECK_WAIT_SECONDS))
+        except FutureTimeoutError:
+            self.warnings.append("Network check is slow to respond - some features may not work")
+
+        for issues, warnings in outcomes:
+            self.issues.extend(issues)
+            self.warnings.extend(warnings)
 
         if self.issues:
             print("❌ Critical Issues Found:")
@@ -122,27 +164,133 @@ class RobustAppLauncher:
 
     def __init__(self):
         self.app_process = None
-        self.port = config.get('app', 'port', 5000)
-        self.host = config.get('app', 'host', '0.0.0.0')
+        self.app_log_path = None
+        self.port = config.port
+        self.host = config.host
 
     def find_available_port(self, start_port=5000, max_attempts=10):
         """Find an available port"""
-        for port in range(start_port, start_port + max_attempts):
-            if self.check_port_available(port):
-                return port
+        # A failed bind leaves the socket unbound, so one socket probes every candidate
+        with self._probe_socket() as s:
+            for port in range(start_port, start_port + max_attempts):
+                if self._try_bind(s, port):
+                    return port
         return None
 
     def check_port_available(self, port):
         """Check if a port is available"""
+        with self._probe_socket() as s:
+            return self._try_bind(s, port)
+
+    @staticmethod
+    def _probe_socket():
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Flask's server sets SO_REUSEADDR too, so ports in TIME_WAIT count as free
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        return s
+
+    def _try_bind(self, s, port):
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind((self.host, port))
-                return True
-        except:
-            return False
+            s.bind((self.host, port))
+            return True
+        except OSError as e:
+            if e.errno in (errno.EADDRINUSE, errno.EACCES):
+                return False
+            raise
 
     def kill_existing_processes(self):
         """Kill any existing Flask processes"""
+        if not os.path.exists('/proc/net/tcp'):
+            return self._kill_existing_processes_with_tools()
+
+        pids = self._find_existing_processes()
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        # Force-kill whatever hasn't exited after the grace period
+        for pid in self._wait_for_exit(pids, KILL_GRACE_SECONDS):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def _find_existing_processes(self):
+        """Find processes listening on our port or running app.py, from /proc"""
+        # Socket inodes listening on our port; state 0A is LISTEN
+        inodes = set()
+        for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+            try:
+                with open(table) as f:
+                    next(f)  # Header
+                    for line in f:
+                        fields = line.split()
+                        if fields[3] == '0A' and int(fields[1].rsplit(':', 1)[1], 16) == self.port:
+                            inodes.add(f'socket:[{fields[9]}]')
+            except (OSError, StopIteration):
+                pass
+
+        own_pid = os.getpid()
+        pids = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit() or int(entry) == own_pid:
+                continue
+            try:
+                with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                    cmdline = f.read().replace(b'\0', b' ').decode(errors='replace')
+                # Same processes as pkill -f 'python.*app.py'
+                if APP_CMDLINE_RE.search(cmdline):
+                    pids.append(int(entry))
+                    continue
+                if inodes:
+                    fd_dir = f'/proc/{entry}/fd'
+                    if any(os.readlink(f'{fd_dir}/{fd}') in inodes for fd in os.listdir(fd_dir)):
+                        pids.append(int(entry))
+            except OSError:
+                pass  # Process exited or belongs to another user
+        return pids
+
+    def _wait_for_exit(self, pids, timeout):
+        """Wait up to timeout for pids to exit, returning the ones still running"""
+        deadline = time.monotonic() + timeout
+        if hasattr(os, 'pidfd_open'):
+            pidfds = {}
+            for pid in pids:
+                try:
+                    pidfds[os.pidfd_open(pid)] = pid
+                except OSError:
+                    pass  # Already gone
+            try:
+                # Each pidfd turns readable when its process exits
+                pending = set(pidfds)
+                while pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    exited, _, _ = select.select(list(pending), [], [], remaining)
+                    pending.difference_update(exited)
+                return [pidfds[fd] for fd in pending]
+            finally:
+                for fd in pidfds:
+                    os.close(fd)
+
+        running = list(pids)
+        while running and time.monotonic() < deadline:
+            time.sleep(0.1)
+            running = [pid for pid in running if self._process_alive(pid)]
+        return running
+
+    @staticmethod
+    def _process_alive(pid):
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+    def _kill_existing_processes_with_tools(self):
+        """Kill existing processes with lsof/pkill where /proc isn't available"""
         try:
             # Kill processes on our port
             result = subprocess.run(['lsof', '-ti', f':{self.port}'],
@@ -175,23 +323,30 @@ class RobustAppLauncher:
         env = os.environ.copy()
         env.update({
             'FLASK_APP': 'app.py',
-            'FLASK_ENV': 'development' if config.get('app', 'debug') else 'production',
+            'FLASK_ENV': 'development' if config.debug else 'production',
             'PYTHONPATH': str(project_root)
         })
 
         # Try to start the app
         try:
             print(f"🚀 Starting Drug Discovery AI System on {self.host}:{self.port}")
-            self.app_process = subprocess.Popen(
-                [sys.executable, 'app.py'],
-                cwd=str(project_root),
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            # Wait for app to start
-            time.sleep(3)
+            # Output goes to a file: a pipe nobody reads would block the app once full.
+            # Without preexec_fn/user/group options Popen spawns via vfork on Linux
+            # (Python 3.10+), so the launcher's memory isn't copied; keep it that way.
+            self.app_log_path = Path(config.get('logging', 'file')).parent / 'app.stdout.log'
+            with open(self.app_log_path, 'ab', buffering=0) as app_log:
+                log_start = app_log.tell()
+                self.app_process = subprocess.Popen(
+                    [sys.executable, 'app.py'],
+                    cwd=str(project_root),
+                    env=env,
+                    stdout=app_log,
+                    stderr=subprocess.STDOUT,
+                    start_new_session=True
+                )
+
+            # Returns early once the app listens or its process exits
+            self.wait_for_listener(STARTUP_GRACE_SECONDS)
 
             # Check if process is still running
             if self.app_process.poll() is None:
@@ -200,31 +355,85 @@ class RobustAppLauncher:
                 print(f"🌐 Or: http://127.0.0.1:{self.port}")
                 return True
             else:
-                stdout, stderr = self.app_process.communicate()
                 print("❌ Application failed to start")
-                if stderr:
-                    print("Error output:", stderr.decode())
-                if stdout:
-                    print("Standard output:", stdout.decode())
+                output = self.read_app_output(log_start)
+                if output:
+                    print("Application output:", output)
                 return False
 
         except Exception as e:
             print(f"❌ Failed to start application: {e}")
             return False
 
-    def wait_for_app_ready(self, timeout=30):
-        """Wait for the app to be ready"""
-        import requests
+    def read_app_output(self, start, max_bytes=APP_OUTPUT_TAIL_BYTES):
+        """Read the end of what the app wrote to its log since offset start"""
+        try:
+            with open(self.app_log_path, 'rb') as app_log:
+                app_log.seek(max(start, app_log.seek(0, os.SEEK_END) - max_bytes))
+                return app_log.read().decode(errors='replace')
+        except OSError:
+            return ''
+
+    def port_accepting(self):
+        """Check if the app accepts connections on its port"""
+        try:
+            with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def wait_for_listener(self, timeout):
+        """
+        Wait until the app accepts connections on its port
 
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        Returns False if the app process exits or timeout passes first. Where
+        pidfds are available (Linux 5.3+, Python 3.9+) the wait between
+        connection attempts wakes as soon as the process exits.
+        """
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
             try:
-                response = requests.get(f'http://localhost:{self.port}', timeout=2)
-                if response.status_code == 200:
+                pidfd = os.pidfd_open(self.app_process.pid)
+            except OSError:
+                pass  # Kernel without pidfd support
+
+        deadline = time.monotonic() + timeout
+        try:
+            while self.app_process.poll() is None:
+                if self.port_accepting():
                     return True
-            except:
-                pass
-            time.sleep(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if pidfd is not None:
+                    # The pidfd turns readable when the process exits
+                    select.select([pidfd], [], [], min(PORT_PROBE_INTERVAL, remaining))
+                else:
+                    time.sleep(min(PORT_PROBE_INTERVAL, remaining))
+            return False
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def wait_for_app_ready(self, timeout=30):
+        """Wait for the app to be ready"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        deadline = time.monotonic() + timeout
+        # One keep-alive connection for every probe; the loop itself does the retrying
+        with requests.Session() as session:
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+            # Only issue HTTP requests once the port is accepting connections; the deadline
+            # is checked here since wait_for_listener still succeeds on an open port at timeout 0
+            while time.monotonic() < deadline and self.wait_for_listener(deadline - time.monotonic()):
+                try:
+                    response = session.get(f'http://localhost:{self.port}', timeout=2)
+                    if response.status_code == 200:
+                        return True
+                except:
+                    pass
+                time.sleep(PORT_PROBE_INTERVAL)
 
         return False
 
@@ -281,7 +490,7 @@ def main():
             # Keep the script running
             print("\n📊 System Status:")
             print("   - Press Ctrl+C to stop the application")
-            print("   - Check logs in the terminal above")
+            print(f"   - Check logs in {launcher.app_log_path}")
 
             try:
                 # Wait for the app process
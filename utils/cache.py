@@ -0,0 +1,85 @@
+"""
+Lightweight caching helpers shared by the agents and the web app
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+_MISSING = object()
+
+def hash_key(key) -> str:
+    """Return a stable hex digest for a (possibly composite) cache key"""
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+
+class TTLCache:
+    """Thread-safe in-memory cache with per-entry expiry and LRU eviction"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class DiskCache:
+    """JSON-file cache whose entries expire ttl seconds after they were written"""
+
+    def __init__(self, directory, ttl: float):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _path(self, key) -> Path:
+        return self.directory / f"{hash_key(key)}.json"
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return default
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def set(self, key, value):
+        """Store value; failures are ignored since the cache is only an optimization"""
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,86 @@
+"""
+Loading helpers for the local CSV datasets used by the file-based agents
+"""
+
+import glob
+import hashlib
+import os
+
+# Bump when load_table changes how it converts columns, so old Parquet copies are rebuilt
+PARQUET_FORMAT_VERSION = 1
+
+def read_csv(csv_path, **kwargs):
+    """Read a CSV with the pyarrow parser, falling back to the default C parser"""
+    import pandas as pd
+
+    try:
+        return pd.read_csv(csv_path, engine='pyarrow', **kwargs)
+    except ImportError:
+        kwargs.pop('dtype_backend', None)
+        return pd.read_csv(csv_path, **kwargs)
+
+def load_table(csv_path, categories=None, integers=None, **kwargs):
+    """
+    Load a CSV dataset through a Parquet copy kept next to it
+
+    The Parquet file is rewritten whenever it is missing or older than the
+    CSV, so edits to the CSV are still picked up. Its file name carries a
+    key for the load arguments and PARQUET_FORMAT_VERSION, so a copy written
+    with different dtypes is never reused. Parquet keeps the parsed dtypes
+    (dates, categories), so later loads skip CSV tokenizing entirely.
+
+    Args:
+        csv_path: Path of the source CSV file
+        categories: Columns to store with the pandas 'category' dtype
+        integers: Integer columns to downcast to the smallest dtype that fits
+        **kwargs: Extra arguments for read_csv, e.g. parse_dates
+    """
+    import pandas as pd
+
+    stem = os.path.splitext(csv_path)[0]
+    schema = repr((PARQUET_FORMAT_VERSION, list(categories or ()), list(integers or ()), sorted(kwargs.items())))
+    parquet_path = f"{stem}.{hashlib.sha1(schema.encode()).hexdigest()[:12]}.parquet"
+    try:
+        if os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            # Memory-mapped so pages are read straight from the OS cache
+            return pd.read_parquet(parquet_path, memory_map=True)
+    except Exception:
+        pass  # Missing, unreadable, or no Parquet engine installed
+
+    df = read_csv(csv_path, **kwargs)
+    for column in categories or ():
+        df[column] = df[column].astype('category')
+    for column in integers or ():
+        df[column] = pd.to_numeric(df[column], downcast='integer')
+
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, compression='zstd')
+        # Atomic rename so concurrent loaders never read a partial file
+        os.replace(tmp_path, parquet_path)
+    except Exception:
+        # Read-only data directory or no Parquet engine, keep using the CSV
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    else:
+        # Drop copies written with other load arguments or an older loader
+        stale_paths = glob.glob(f"{glob.escape(stem)}.*.parquet") + glob.glob(f"{glob.escape(stem)}.parquet")
+        for stale_path in stale_paths:
+            if stale_path != parquet_path:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+    return df
+
+def to_records(df):
+    """
+    Convert a DataFrame to a list of row dicts
+
+    Same result as df.to_dict('records'), but each column is converted to
+    Python objects with a single vectorized tolist() call instead of the
+    values being boxed row by row.
+    """
+    columns = df.columns.tolist()
+    values = [df[column].tolist() for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
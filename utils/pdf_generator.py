@@ -1,36 +1,70 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
+from operator import itemgetter
 import os
 
+# reportlab is imported by the first report rather than here: it costs hundreds
+# of milliseconds and several MB, and many app sessions never build a PDF
+
+_REPORT_WRITE_BUFFER_BYTES = 1024 * 1024
+
 class PDFGenerator:
+    # Stylesheet and derived styles, built by the first report and then shared
+    _shared_styles = None
+
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.title_style = ParagraphStyle(
+        self.styles = self.title_style = self.heading_style = self.normal_style = None
+        self.table_style = None
+
+    def _load_styles(self):
+        cls = type(self)
+        if cls._shared_styles is None:
+            cls._shared_styles = cls._create_styles()
+        self.styles, self.title_style, self.heading_style, self.table_style = cls._shared_styles
+        self.normal_style = self.styles['Normal']
+
+    @staticmethod
+    def _create_styles():
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
             'CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=18,
             spaceAfter=30,
         )
-        self.heading_style = ParagraphStyle(
+        heading_style = ParagraphStyle(
             'CustomHeading',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=14,
             spaceAfter=20,
         )
-        self.normal_style = self.styles['Normal']
+        # Shared by every table in every report
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+        return styles, title_style, heading_style, table_style
 
     def generate_report(self, query, results, summary, output_buffer=None):
         """
         Generate a comprehensive PDF report
         If output_buffer is provided, writes to buffer, else to file
         """
-        if output_buffer:
-            doc = SimpleDocTemplate(output_buffer, pagesize=letter)
-        else:
-            output_path = os.path.join(os.path.dirname(__file__), '..', 'reports', f'report_{query.replace(" ", "_")}.pdf')
-            doc = SimpleDocTemplate(output_path, pagesize=letter)
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
+        if self.styles is None:
+            self._load_styles()
+        # Content streams always zlib-compressed, whatever the global reportlab config says
+        doc_options = {'pagesize': letter, 'pageCompression': 1}
 
         story = []
 
@@ -40,7 +74,12 @@ class PDFGenerator:
 
         # Executive Summary
         story.append(Paragraph("Executive Summary", self.heading_style))
-        story.append(Paragraph(summary.replace('\n', '<br/>'), self.normal_style))
+        # One Paragraph per line rather than one long paragraph full of <br/> tags
+        for line in summary.split('\n'):
+            if line.strip():
+                story.append(Paragraph(line, self.normal_style))
+            else:
+                story.append(Spacer(1, self.normal_style.leading))
         story.append(Spacer(1, 12))
 
         # Individual Agent Results
@@ -50,26 +89,28 @@ class PDFGenerator:
 
             if result['data']:
                 # Create table from data
-                if isinstance(result['data'], list) and result['data']:
+                if isinstance(result['data'], list) and result['data'] and result['data'][0]:
                     headers = list(result['data'][0].keys())
                     table_data = [headers]
+                    # Missing cells default to '', then one itemgetter call fetches each row
+                    defaults = dict.fromkeys(headers, '')
+                    get_cells = itemgetter(*headers)
                     for row in result['data'][:10]:  # Limit to 10 rows
-                        table_data.append([str(row.get(h, '')) for h in headers])
+                        cells = get_cells({**defaults, **row})
+                        table_data.append(list(map(str, cells)) if len(headers) > 1 else [str(cells)])
 
                     table = Table(table_data)
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (0, 0), 12),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
+                    table.setStyle(self.table_style)
                     story.append(table)
                     story.append(Spacer(1, 12))
 
         # Build PDF
-        doc.build(story)
-        return output_buffer if output_buffer else output_path
\ No newline at end of file
+        if output_buffer:
+            SimpleDocTemplate(output_buffer, **doc_options).build(story)
+            return output_buffer
+
+        output_path = os.path.join(os.path.dirname(__file__), '..', 'reports', f'report_{query.replace(" ", "_")}.pdf')
+        # Large buffer so reportlab's many small writes become a few syscalls
+        with open(output_path, 'wb', buffering=_REPORT_WRITE_BUFFER_BYTES) as output_file:
+            SimpleDocTemplate(output_file, **doc_options).build(story)
+        return output_path
\ No newline at end of file
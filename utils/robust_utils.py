@@ -3,8 +3,13 @@ Robust error handling and fallback utilities for the drug discovery system
 """
 
 import logging
+import logging.handlers
 import time
 import functools
+import random
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Any, Callable, Optional
 from pathlib import Path
 from config import config
@@ -22,7 +27,8 @@ def setup_logging():
         level=getattr(logging, log_config.get('level', 'INFO')),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(log_file),
+            # Watched so external log rotation is picked up; opened on the first record
+            logging.handlers.WatchedFileHandler(log_file, delay=True),
             logging.StreamHandler()
         ]
     )
@@ -34,7 +40,21 @@ def setup_logging():
 
     return logging.getLogger(__name__)
 
-logger = setup_logging()
+_logger = None
+
+def _get_logger():
+    """Return the module logger, setting up logging on first use"""
+    global _logger
+    if _logger is None:
+        _logger = setup_logging()
+    return _logger
+
+def __getattr__(name):
+    # Keeps `from utils.robust_utils import logger` working without configuring
+    # logging at import time for modules that only need the helpers
+    if name == 'logger':
+        return _get_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class AgentError(Exception):
     """Base exception for agent errors"""
@@ -52,34 +72,50 @@ class DataError(AgentError):
     """Data-related errors"""
     pass
 
-def robust_call(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
+# Errors worth retrying; OSError covers connection errors and timeouts, requests' included
+_RETRYABLE_ERRORS = (APIError, OSError)
+
+def robust_call(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0,
+                deadline: Optional[float] = None, retry_on: tuple = _RETRYABLE_ERRORS):
     """
     Decorator for robust function calls with retries and error handling
 
+    Delays are jittered so concurrent callers don't retry in lockstep. Other
+    exceptions (usually bugs such as KeyError) are raised without retrying.
+
     Args:
         max_retries: Maximum number of retry attempts
         delay: Initial delay between retries
         backoff: Backoff multiplier for delay
+        deadline: Optional cap in seconds on the total time spent retrying
+        retry_on: Exception types that trigger a retry
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             last_exception = None
             current_delay = delay
+            end = time.monotonic() + deadline if deadline is not None else None
 
             for attempt in range(max_retries + 1):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except retry_on as e:
                     last_exception = e
-                    logger.warning(f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}: {e}")
+                    _get_logger().warning(f"Attempt {attempt + 1}/{max_retries + 1} failed for {func.__name__}: {e}")
 
                     if attempt < max_retries:
-                        logger.info(f"Retrying in {current_delay:.1f} seconds...")
-                        time.sleep(current_delay)
+                        sleep_for = current_delay * random.uniform(0.5, 1.5)
+                        if end is not None:
+                            sleep_for = min(sleep_for, end - time.monotonic())
+                            if sleep_for <= 0:
+                                _get_logger().error(f"Retry deadline reached for {func.__name__}")
+                                break
+                        _get_logger().info(f"Retrying in {sleep_for:.1f} seconds...")
+                        time.sleep(sleep_for)
                         current_delay *= backoff
                     else:
-                        logger.error(f"All {max_retries + 1} attempts failed for {func.__name__}")
+                        _get_logger().error(f"All {max_retries + 1} attempts failed for {func.__name__}")
 
             # If we get here, all retries failed
             raise last_exception
@@ -87,6 +123,27 @@ def robust_call(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
         return wrapper
     return decorator
 
+def run_with_timeout(func: Callable, timeout: float, *args, **kwargs):
+    """
+    Run a function in a worker thread and wait at most timeout seconds for it
+
+    Unlike signal.alarm this works from any thread and on any platform. On
+    timeout the worker is left to finish in the background and TimeoutError
+    is raised to the caller.
+
+    Args:
+        func: The function to call
+        timeout: Maximum number of seconds to wait for the result
+        *args, **kwargs: Arguments to pass to the function
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(func, *args, **kwargs).result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"{func.__name__} timed out after {timeout} seconds")
+    finally:
+        executor.shutdown(wait=False)
+
 def safe_api_call(api_func: Callable, fallback_func: Optional[Callable] = None, *args, **kwargs):
     """
     Safely call an API function with automatic fallback
@@ -97,7 +154,7 @@ def safe_api_call(api_func: Callable, fallback_func: Optional[Callable] = None,
         *args, **kwargs: Arguments to pass to the functions
     """
     try:
-        logger.debug(f"Calling API function: {api_func.__name__}")
+        _get_logger().debug(f"Calling API function: {api_func.__name__}")
         result = api_func(*args, **kwargs)
 
         # Check if result is valid (not empty/null)
@@ -107,13 +164,13 @@ def safe_api_call(api_func: Callable, fallback_func: Optional[Callable] = None,
         return result
 
     except Exception as e:
-        logger.warning(f"API call failed: {e}")
+        _get_logger().warning(f"API call failed: {e}")
         if fallback_func:
             try:
-                logger.info(f"Using fallback function: {fallback_func.__name__}")
+                _get_logger().info(f"Using fallback function: {fallback_func.__name__}")
                 return fallback_func(*args, **kwargs)
             except Exception as fallback_e:
-                logger.error(f"Fallback also failed: {fallback_e}")
+                _get_logger().error(f"Fallback also failed: {fallback_e}")
                 raise AgentError(f"Both API and fallback failed: {e}, {fallback_e}")
         else:
             raise AgentError(f"API call failed and no fallback available: {e}")
@@ -127,25 +184,25 @@ def safe_model_operation(model_func: Callable, fallback_func: Optional[Callable]
         fallback_func: Fallback function if model operation fails
         *args, **kwargs: Arguments to pass to the functions
     """
-    if not config.is_ml_enabled('prediction'):  # Generic check, can be made specific
+    if not config.ml_prediction_enabled:  # Generic check, can be made specific
         if fallback_func:
-            logger.info("ML disabled, using fallback")
+            _get_logger().info("ML disabled, using fallback")
             return fallback_func(*args, **kwargs)
         else:
             raise ModelError("ML operations disabled and no fallback available")
 
     try:
-        logger.debug(f"Performing model operation: {model_func.__name__}")
+        _get_logger().debug(f"Performing model operation: {model_func.__name__}")
         return model_func(*args, **kwargs)
 
     except Exception as e:
-        logger.warning(f"Model operation failed: {e}")
+        _get_logger().warning(f"Model operation failed: {e}")
         if fallback_func:
             try:
-                logger.info(f"Using model fallback: {fallback_func.__name__}")
+                _get_logger().info(f"Using model fallback: {fallback_func.__name__}")
                 return fallback_func(*args, **kwargs)
             except Exception as fallback_e:
-                logger.error(f"Model fallback also failed: {fallback_e}")
+                _get_logger().error(f"Model fallback also failed: {fallback_e}")
                 raise ModelError(f"Both model operation and fallback failed: {e}, {fallback_e}")
         else:
             raise ModelError(f"Model operation failed and no fallback available: {e}")
@@ -158,24 +215,33 @@ def check_memory_usage():
         memory_gb = process.memory_info().rss / (1024**3)
         max_memory = config.get_memory_limit()
 
-        if memory_gb > max_memory * 0.8:
-            logger.warning(".1f")
-        elif memory_gb > max_memory:
-            logger.error(".1f")
+        # Over the limit is checked first; the 80% warning would otherwise shadow it
+        if memory_gb > max_memory:
+            _get_logger().error(f"Memory usage {memory_gb:.1f} GB exceeds the {max_memory:.1f} GB limit")
             return False
+        elif memory_gb > max_memory * 0.8:
+            _get_logger().warning(f"Memory usage {memory_gb:.1f} GB is above 80% of the {max_memory:.1f} GB limit")
 
         return True
     except ImportError:
-        logger.debug("psutil not available for memory monitoring")
+        _get_logger().debug("psutil not available for memory monitoring")
         return True
     except Exception as e:
-        logger.debug(f"Memory check failed: {e}")
+        _get_logger().debug(f"Memory check failed: {e}")
         return True
 
+# Values validate_data_structure passes through; None is left out since it is rejected
+_PLAIN_TYPES = frozenset((str, int, float, bool))
+
 def validate_data_structure(data, expected_keys=None):
     """
     Validate data structure and convert types if needed
 
+    Containers that need no conversion are returned as they are, not copied,
+    so the result may share objects with data. Callers that keep the result
+    apart from a cache must copy it there (MasterAgent's and the market
+    agent's caches do).
+
     Args:
         data: Data to validate
         expected_keys: List of expected keys in the data
@@ -184,20 +250,26 @@ def validate_data_structure(data, expected_keys=None):
         raise DataError("Data is None")
 
     # Convert numpy types to Python types for JSON serialization
-    if hasattr(data, 'item'):  # numpy scalar
-        data = data.item()
-    elif hasattr(data, 'tolist'):  # numpy array
+    if hasattr(data, 'tolist'):  # numpy array or scalar, converted in one C call
         data = data.tolist()
+    elif hasattr(data, 'item'):  # other scalar wrappers
+        data = data.item()
     elif isinstance(data, dict):
-        data = {k: validate_data_structure(v) for k, v in data.items()}
+        # Flat dicts (e.g. table rows) have nothing to convert, so they are returned
+        # as they are instead of being copied once per row
+        if not all(type(v) in _PLAIN_TYPES for v in data.values()):
+            data = {k: validate_data_structure(v) for k, v in data.items()}
     elif isinstance(data, (list, tuple)):
-        data = [validate_data_structure(item) for item in data]
+        if not all(type(item) in _PLAIN_TYPES for item in data):
+            data = [validate_data_structure(item) for item in data]
+        elif isinstance(data, tuple):
+            data = list(data)
 
     # Check expected keys if provided
     if expected_keys and isinstance(data, dict):
         missing_keys = set(expected_keys) - set(data.keys())
         if missing_keys:
-            logger.warning(f"Missing expected keys: {missing_keys}")
+            _get_logger().warning(f"Missing expected keys: {missing_keys}")
 
     return data
 
@@ -221,11 +293,28 @@ def create_error_response(agent_name: str, error: Exception, fallback_data=None)
         'error_type': type(error).__name__
     }
 
-    logger.error(f"Agent {agent_name} error response: {error_msg}")
+    _get_logger().error(f"Agent {agent_name} error response: {error_msg}")
     return response
 
-def health_check():
-    """Perform a comprehensive health check"""
+# Agent modules checked by health_check; ML agents only when their config flag is on
+_CORE_AGENT_MODULES = (
+    'market_agent', 'exim_agent', 'patent_agent', 'clinical_agent',
+    'internal_agent', 'web_agent', 'literature_agent'
+)
+_ML_AGENT_MODULES = (
+    ('ml_prediction_agent', 'ml_prediction_enabled'),
+    ('generative_ai_agent', 'generative_ai_enabled'),
+    ('nlp_analysis_agent', 'nlp_analysis_enabled')
+)
+
+def health_check(deep: bool = False):
+    """
+    Perform a comprehensive health check
+
+    Args:
+        deep: Import every agent module instead of only locating it; slow,
+            so meant for CLI diagnostics rather than liveness probes
+    """
     health_status = {
         'overall': 'healthy',
         'checks': {},
@@ -234,7 +323,7 @@ def health_check():
 
     # Check configuration
     try:
-        config.get('app', 'port')
+        config.port
         health_status['checks']['config'] = 'ok'
     except Exception as e:
         health_status['checks']['config'] = f'error: {e}'
@@ -255,23 +344,16 @@ def health_check():
             health_status['overall'] = 'degraded'
 
     # Check if we can import all agents
-    agents_to_check = [
-        'market_agent', 'exim_agent', 'patent_agent', 'clinical_agent',
-        'internal_agent', 'web_agent', 'literature_agent'
-    ]
-
-    if config.is_ml_enabled('prediction'):
-        agents_to_check.extend(['ml_prediction_agent'])
-
-    if config.is_ml_enabled('generative_ai'):
-        agents_to_check.extend(['generative_ai_agent'])
-
-    if config.is_ml_enabled('nlp_analysis'):
-        agents_to_check.extend(['nlp_analysis_agent'])
+    agents_to_check = _CORE_AGENT_MODULES + tuple(
+        module for module, enabled_flag in _ML_AGENT_MODULES if getattr(config, enabled_flag)
+    )
 
     for agent_module in agents_to_check:
         try:
-            __import__(f'agents.{agent_module}')
+            if deep:
+                importlib.import_module(f'agents.{agent_module}')
+            elif importlib.util.find_spec(f'agents.{agent_module}') is None:
+                raise ImportError('not found')
             health_status['checks'][f'agent_{agent_module}'] = 'ok'
         except Exception as e:
             health_status['checks'][f'agent_{agent_module}'] = f'error: {e}'